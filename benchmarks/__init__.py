@@ -0,0 +1 @@
+"""Offline benchmarks of KEGGpull, run with ``python -m benchmarks.run``"""
@@ -0,0 +1,217 @@
+"""Offline KEGGpull benchmarks against a local KEGG stand-in
+
+Run from the repository root with the package importable::
+
+    python -m benchmarks.run                    # compare with benchmarks/baselines.json
+    python -m benchmarks.run --update-baseline  # record new baselines on this machine
+
+Every stage runs in a fresh interpreter so its peak RSS is its own, the
+stand-in server runs in a child process of its own. A metric that is worse
+than its baseline by more than the tolerance fails the run.
+"""
+
+import argparse
+import asyncio
+import json
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+from keggpull.argparser import init_parser
+from keggpull.client import KeggClient
+from keggpull.compounds import PathwayMembership
+from keggpull.main import main
+from keggpull.metrics import peak_rss_mb
+from keggpull.pipeline import parse_document
+from keggpull.scheduler import Scheduler
+from keggpull.utilities import fetch_pathway_kgml
+from keggpull.writer import write_table
+
+from tests.standin import DATA_DIR
+
+from .standin import BenchmarkStandIn, serve_in_process, synthetic_kgml
+
+__author__ = "RGmetab"
+__copyright__ = "RGmetab"
+__license__ = "MIT"
+
+
+BASELINE_FILE = Path(__file__).parent / "baselines.json"
+DEFAULT_TOLERANCE = 0.3
+# metric -> whether higher values are better
+METRICS = {
+    "startup.help_s": False,
+    "fetch.pathways_per_s": True,
+    "fetch.peak_rss_mb": False,
+    "parse.recorded_s_per_mb": False,
+    "parse.synthetic_s_per_mb": False,
+    "parse.all_entities_s_per_mb": False,
+    "parse.peak_rss_mb": False,
+    "table.wide_s_per_million_cells": False,
+    "table.long_s_per_million_cells": False,
+    "table.peak_rss_mb": False,
+    "end_to_end.pathways_per_s": True,
+    "end_to_end.peak_rss_mb": False,
+}
+
+
+async def _fetch(standin: BenchmarkStandIn, url: str, concurrency: int) -> None:
+    async with KeggClient(url, scheduler=Scheduler(concurrency, rate=None), backoff=0.01) as client:
+        codes = standin.pathway_codes(standin.organisms[0])
+        await asyncio.gather(*[fetch_pathway_kgml(code, client) for code in codes])
+
+
+def bench_startup() -> dict[str, float]:
+    """Runs ``keggpull --help`` in a new interpreter, the best of 10 runs"""
+    command = [sys.executable, "-c", "import sys; from keggpull.main import run; sys.argv[1:] = ['--help']; run()"]
+    timings = []
+    for _ in range(10):
+        start = time.perf_counter()
+        subprocess.run(command, check=True, capture_output=True)
+        timings.append(time.perf_counter() - start)
+    return {"help_s": min(timings)}
+
+
+def bench_fetch() -> dict[str, float]:
+    """Downloads 200 recorded KGML maps with 5 ms latency and 8 requests in flight"""
+    standin = BenchmarkStandIn(pathways=200, latency=0.005)
+    with serve_in_process(standin) as url:
+        start = time.perf_counter()
+        asyncio.run(_fetch(standin, url, 8))
+        elapsed = time.perf_counter() - start
+    return {"pathways_per_s": standin.pathways / elapsed}
+
+
+def _seconds_per_mb(document: str, repeat: int, **kwargs) -> float:
+    start = time.perf_counter()
+    for _ in range(repeat):
+        parse_document("hsa00010", document, **kwargs)
+    return (time.perf_counter() - start) / (repeat * len(document.encode("utf-8")) / 2**20)
+
+
+def bench_parse() -> dict[str, float]:
+    """Parses the recorded hsa00010 map and a synthetic map with 5000 compounds"""
+    recorded = (DATA_DIR / "hsa00010.kgml").read_text()
+    synthetic = synthetic_kgml("hsa00010", 5000)
+    return {
+        "recorded_s_per_mb": _seconds_per_mb(recorded, 200),
+        "synthetic_s_per_mb": _seconds_per_mb(synthetic, 5),
+        "all_entities_s_per_mb": _seconds_per_mb(
+            synthetic, 5, entity_types=("compound", "gene", "ortholog", "reaction", "equation", "map", "relation")
+        ),
+    }
+
+
+def bench_table() -> dict[str, float]:
+    """Writes 2000 pathways of up to 500 compounds as wide and long tables"""
+    membership = PathwayMembership()
+    for number in range(2000):
+        membership.add(f"hsa{number:05d}", [f"C{(number + offset) % 20000:05d}" for offset in range(number % 500)])
+    cells = len(membership.indices)
+    results = {}
+    with tempfile.TemporaryDirectory() as directory:
+        for output_format in ("wide", "long"):
+            start = time.perf_counter()
+            write_table(membership.columns(), f"{directory}/table.tsv", output_format)
+            results[f"{output_format}_s_per_million_cells"] = (time.perf_counter() - start) / (cells / 1e6)
+    return results
+
+
+async def _end_to_end(standin: BenchmarkStandIn, url: str, output_dir: str) -> None:
+    args = init_parser().parse_args(
+        ["-o", *standin.organisms, "-of", f"{output_dir}/{{organism}}.tsv", "-c", "8", "-r", "0"]
+    )
+    async with KeggClient(url, scheduler=Scheduler(8, rate=None), backoff=0.01) as client:
+        await main(args, client)
+
+
+def bench_end_to_end() -> dict[str, float]:
+    """Pulls 4 organisms of 100 pathways with 2 ms latency, 5% errors and 1000 requests/s throttling"""
+    standin = BenchmarkStandIn(organisms=4, pathways=100, latency=0.002, error_rate=0.05, throttle=1000)
+    with tempfile.TemporaryDirectory() as directory, serve_in_process(standin) as url:
+        start = time.perf_counter()
+        asyncio.run(_end_to_end(standin, url, directory))
+        elapsed = time.perf_counter() - start
+    return {"pathways_per_s": len(standin.organisms) * standin.pathways / elapsed}
+
+
+STAGES = {
+    "startup": bench_startup,
+    "fetch": bench_fetch,
+    "parse": bench_parse,
+    "table": bench_table,
+    "end_to_end": bench_end_to_end,
+}
+
+
+def run_stage(stage: str) -> dict[str, float]:
+    """Runs one stage in a fresh interpreter and returns its metrics"""
+    output = subprocess.run(
+        [sys.executable, "-m", "benchmarks.run", "--stage", stage],
+        check=True,
+        capture_output=True,
+        text=True,
+    ).stdout
+    return json.loads(output.splitlines()[-1])
+
+
+def compare(results: dict[str, float], baselines: dict[str, float], tolerance: float) -> list[str]:
+    """Returns a message for every metric that regressed beyond ``tolerance``"""
+    regressions = []
+    for metric, higher_is_better in METRICS.items():
+        if metric not in baselines or metric not in results:
+            continue
+        baseline, value = baselines[metric], results[metric]
+        if higher_is_better and value < baseline * (1 - tolerance):
+            regressions.append(f"{metric}: {value:.4g} < {baseline:.4g}")
+        elif not higher_is_better and value > baseline * (1 + tolerance):
+            regressions.append(f"{metric}: {value:.4g} > {baseline:.4g}")
+    return regressions
+
+
+def parse_args(argv: list[str]) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.run", description=__doc__.splitlines()[0])
+    parser.add_argument("--stage", choices=STAGES, help="run one stage in this process and print its metrics")
+    parser.add_argument("--baseline", default=BASELINE_FILE, type=Path, help="baseline file")
+    parser.add_argument("--update-baseline", action="store_true", help="store the results as the new baseline")
+    parser.add_argument(
+        "--tolerance",
+        default=DEFAULT_TOLERANCE,
+        type=float,
+        help=f"allowed relative regression (default: {DEFAULT_TOLERANCE})",
+    )
+    return parser.parse_args(argv)
+
+
+def run(argv: list[str] | None = None) -> int:
+    args = parse_args(sys.argv[1:] if argv is None else argv)
+    if args.stage:
+        metrics = STAGES[args.stage]()
+        # startup runs keggpull in subprocesses, the peak RSS of this process would not be theirs
+        if args.stage != "startup" and peak_rss_mb() is not None:
+            metrics["peak_rss_mb"] = peak_rss_mb()
+        print(json.dumps(metrics))
+        return 0
+
+    results = {}
+    for stage in STAGES:
+        for metric, value in run_stage(stage).items():
+            name = f"{stage}.{metric}"
+            results[name] = value
+            print(f"{name:<40} {value:12.4g}")
+
+    if args.update_baseline:
+        args.baseline.write_text(json.dumps(results, indent=2, sort_keys=True) + "\n")
+        print(f"Baseline stored in {args.baseline}")
+        return 0
+    baselines = json.loads(args.baseline.read_text()) if args.baseline.exists() else {}
+    regressions = compare(results, baselines, args.tolerance)
+    for regression in regressions:
+        print(f"REGRESSION {regression}")
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(run())
@@ -0,0 +1,143 @@
+"""A local KEGG stand-in for benchmarks, with configurable latency, errors and throttling"""
+
+import asyncio
+import multiprocessing
+import random
+import time
+from collections import deque
+from collections.abc import Iterator
+from contextlib import contextmanager
+
+from aiohttp import web
+from aiohttp.test_utils import TestServer
+
+from tests.standin import KeggStandIn
+
+__author__ = "RGmetab"
+__copyright__ = "RGmetab"
+__license__ = "MIT"
+
+
+def synthetic_kgml(path_code: str, compounds: int, seed: int = 0) -> str:
+    """Builds a KGML map with ``compounds`` compound entries, as many gene entries and reactions"""
+    rng = random.Random(seed)
+    organism = path_code[:-5]
+    lines = [
+        '<?xml version="1.0"?>',
+        f'<pathway name="path:{path_code}" org="{organism}" number="{path_code[-5:]}" title="Synthetic map">',
+    ]
+    for number in range(compounds):
+        lines.append(
+            f'    <entry id="{number + 1}" name="cpd:C{number:05d}" type="compound">\n'
+            f'        <graphics name="C{number:05d}" type="circle" x="{number % 1000}" y="{number // 1000}"/>\n'
+            "    </entry>"
+        )
+    for number in range(compounds):
+        lines.append(
+            f'    <entry id="{compounds + number + 1}" name="{organism}:{number + 1} {organism}:{number + 2}"'
+            f' type="gene" reaction="rn:R{number:05d}">\n'
+            f'        <graphics name="GENE{number}" type="rectangle" x="{number % 1000}" y="{number // 1000}"/>\n'
+            "    </entry>"
+        )
+    for number in range(compounds):
+        substrate, product = rng.randrange(compounds), rng.randrange(compounds)
+        lines.append(
+            f'    <reaction id="{compounds + number + 1}" name="rn:R{number:05d}" type="reversible">\n'
+            f'        <substrate id="{substrate + 1}" name="cpd:C{substrate:05d}"/>\n'
+            f'        <product id="{product + 1}" name="cpd:C{product:05d}"/>\n'
+            "    </reaction>"
+        )
+    lines.append("</pathway>\n")
+    return "\n".join(lines)
+
+
+class BenchmarkStandIn(KeggStandIn):
+    """The test stand-in with benchmark organisms, latency, errors and throttling
+
+    Every organism lists ``pathways`` pathways, all served from the recorded
+    map or a synthetic one. Every response is delayed by ``latency`` seconds,
+    a fraction ``error_rate`` of pathway requests fails with status 503, and
+    requests beyond ``throttle`` per second are answered with status 429.
+    """
+
+    def __init__(
+        self,
+        organisms: int = 1,
+        pathways: int = 100,
+        latency: float = 0.0,
+        error_rate: float = 0.0,
+        throttle: float | None = None,
+        synthetic_compounds: int | None = None,
+        seed: int = 0,
+    ):
+        super().__init__()
+        self.organisms = [f"b{chr(97 + number // 26)}{chr(97 + number % 26)}" for number in range(organisms)]
+        self.pathways = pathways
+        self.latency = latency
+        self.error_rate = error_rate
+        self.throttle = throttle
+        if synthetic_compounds:
+            self.kgml = synthetic_kgml("hsa00010", synthetic_compounds, seed)
+        self.failed = 0
+        self.throttled = 0
+        self._random = random.Random(seed)
+        self._recent = deque()
+
+    def pathway_codes(self, organism: str) -> list[str]:
+        return [f"{organism}{number:05d}" for number in range(10, 10 * (self.pathways + 1), 10)]
+
+    @web.middleware
+    async def record(self, request: web.Request, handler) -> web.StreamResponse:
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        if self.throttle:
+            now = time.monotonic()
+            while self._recent and now - self._recent[0] > 1.0:
+                self._recent.popleft()
+            if len(self._recent) >= self.throttle:
+                self.throttled += 1
+                return web.Response(status=429)
+            self._recent.append(now)
+        if request.path.startswith("/get/") and self._random.random() < self.error_rate:
+            self.failed += 1
+            return web.Response(status=503)
+        return await super().record(request, handler)
+
+    async def list_organism(self, request: web.Request) -> web.Response:
+        return web.Response(
+            text="".join(
+                f"T{number:05d}\t{organism}\tOrganism {number}\tBenchmark\n"
+                for number, organism in enumerate(self.organisms)
+            )
+        )
+
+    async def list_pathway(self, request: web.Request) -> web.Response:
+        organism = request.match_info["organism"]
+        return web.Response(
+            text="".join(f"path:{code}\tPathway {code}\n" for code in self.pathway_codes(organism))
+        )
+
+
+def _serve(standin: BenchmarkStandIn, connection) -> None:
+    async def serve():
+        async with TestServer(standin.app) as server:
+            connection.send(str(server.make_url("")))
+            await asyncio.get_running_loop().run_in_executor(None, connection.recv)
+
+    asyncio.run(serve())
+
+
+@contextmanager
+def serve_in_process(standin: BenchmarkStandIn) -> Iterator[str]:
+    """Serves the stand-in from a child process and yields its URL
+
+    The server's memory is not counted in the peak RSS of the benchmark process.
+    """
+    connection, child_connection = multiprocessing.Pipe()
+    process = multiprocessing.Process(target=_serve, args=(standin, child_connection), daemon=True)
+    process.start()
+    try:
+        yield connection.recv()
+    finally:
+        connection.send(None)
+        process.join()
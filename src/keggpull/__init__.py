@@ -14,3 +14,8 @@ except PackageNotFoundError:  # pragma: no cover
     __version__ = "unknown"
 finally:
     del version, PackageNotFoundError
+
+from .snapshot import Snapshot  # noqa: E402
+from .api import stream, stream_sync  # noqa: E402
+
+__all__ = ["Snapshot", "stream", "stream_sync"]
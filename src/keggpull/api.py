@@ -0,0 +1,107 @@
+import asyncio
+from collections.abc import AsyncIterator, Iterable, Iterator, Sequence
+from concurrent.futures import Executor, ProcessPoolExecutor
+from typing import TYPE_CHECKING
+
+from . import utilities as utils
+from .cache import ResponseCache
+from .client import KEGG_REST_URL, KeggClient
+from .logger import logger
+from .pipeline import PROCESS_CHUNK_SIZE, pull_pathways
+from .utilities import PathwayFailure
+
+if TYPE_CHECKING:
+    import aiohttp
+
+__author__ = "R-Grosman"
+__copyright__ = "R-Grosman"
+__license__ = "MIT"
+__version__ = "0.2.0"
+
+
+async def stream(
+    organisms: str | Iterable[str],
+    entity_types: str | Sequence[str] = "compound",
+    pathway_format: str = "kgml",
+    client: KeggClient | None = None,
+    base_url: str = KEGG_REST_URL,
+    session: "aiohttp.ClientSession | None" = None,
+    cache: ResponseCache | None = None,
+    executor: Executor | None = None,
+    failures: list[PathwayFailure] | None = None,
+) -> AsyncIterator[tuple[str, list[str] | dict[str, list[str]]]]:
+    """Yields ``(path code, Compounds)`` for the pathways of ``organisms`` as each one is extracted
+
+    Runs on the caller's event loop. A ``client`` is used as is and left open,
+    otherwise a client for ``base_url`` is built on ``session`` and ``cache``
+    and closed at the end, an external session is never closed. Every pathway
+    is fetched once, even when several organisms share it. With a sequence of
+    ``entity_types`` the second item maps each type to its IDs. Pathways that
+    cannot be fetched or parsed are logged, skipped and appended to
+    ``failures`` if given.
+
+    Raises:
+      FetchError: the organism or pathway lists could not be fetched
+    """
+    selected = [entity_types] if isinstance(entity_types, str) else list(entity_types)
+    organisms = [organisms] if isinstance(organisms, str) else list(organisms)
+    owns_client = client is None
+    if owns_client:
+        client = KeggClient(base_url, session=session, cache=cache)
+    try:
+        if organisms == ["all"]:
+            organisms = await utils.get_organism_codes(client)
+        pathway_lists = await asyncio.gather(
+            *[utils.get_organism_pathways(organism, client) for organism in organisms]
+        )
+        paths = list(
+            dict.fromkeys(path for paths in pathway_lists for path in utils.parse_organism_pathways(paths))
+        )
+        async for pathway in pull_pathways(
+            paths,
+            client,
+            pathway_format,
+            executor=executor,
+            chunk_size=PROCESS_CHUNK_SIZE if isinstance(executor, ProcessPoolExecutor) else 1,
+            progress=False,
+            entity_types=selected,
+        ):
+            if isinstance(pathway, PathwayFailure):
+                logger.warning(f"Skipping {pathway.pathway_code}: {pathway.reason}")
+                if failures is not None:
+                    failures.append(pathway)
+                continue
+            if isinstance(entity_types, str):
+                yield pathway.pathway_code, pathway.members(entity_types)
+            else:
+                yield pathway.pathway_code, {entity_type: pathway.members(entity_type) for entity_type in selected}
+    finally:
+        if owns_client:
+            await client.close()
+
+
+def stream_sync(
+    organisms: str | Iterable[str],
+    *args,
+    loop: asyncio.AbstractEventLoop | None = None,
+    **kwargs,
+) -> Iterator[tuple[str, list[str] | dict[str, list[str]]]]:
+    """Yields the results of ``stream`` from synchronous code, taking the same arguments
+
+    Each result is yielded as soon as it is extracted. The stream runs on
+    ``loop``, or on a new event loop that is closed afterwards, and must not be
+    called from a running event loop.
+    """
+    run_loop = loop or asyncio.new_event_loop()
+    results = stream(organisms, *args, **kwargs)
+    try:
+        while True:
+            try:
+                yield run_loop.run_until_complete(results.__anext__())
+            except StopAsyncIteration:
+                break
+    finally:
+        run_loop.run_until_complete(results.aclose())
+        if loop is None:
+            run_loop.run_until_complete(run_loop.shutdown_asyncgens())
+            run_loop.close()
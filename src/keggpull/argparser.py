@@ -1,6 +1,15 @@
 import argparse
 import logging
 
+from .cache import DEFAULT_TTL_DAYS
+from .catalog import CATALOG_FIELDS
+from .client import DEFAULT_RETRIES, DEFAULT_TIMEOUT
+from .export import MATRIX_FORMATS
+from .kgml import ENTITY_TYPES
+from .scheduler import DEFAULT_MAX_IN_FLIGHT, DEFAULT_RATE
+from .utilities import MAX_BATCH_SIZE, PATHWAY_FORMATS
+from .writer import OUTPUT_FORMATS
+
 __author__ = "R-Grosman"
 __copyright__ = "R-Grosman"
 __license__ = "MIT"
@@ -17,7 +26,15 @@ def init_parser() -> argparse.ArgumentParser:
     Returns:
       :obj:`argparse.Namespace`: command line parameters namespace
     """
-    parser = argparse.ArgumentParser(description="Tabulate and export all pathways and its metabolites for a given organism in tab separated format.")
+    parser = argparse.ArgumentParser(
+        description=(
+            "Tabulate and export all pathways and its metabolites for a given organism in tab separated format."
+        ),
+        epilog=(
+            "Run 'keggpull enrich --help' for the pathway enrichment subcommand"
+            " and 'keggpull query --help' to look up compounds in a snapshot."
+        ),
+    )
     parser.add_argument(
         "--version",
         action="version",
@@ -27,19 +44,230 @@ def init_parser() -> argparse.ArgumentParser:
         "-o",
         "--organism",
         dest="organism",
-        help="three letter organism code e.g. hsa",
+        help=(
+            "three letter organism code e.g. hsa, several codes pull a batch of organisms,"
+            " 'all' pulls every KEGG organism and 'map'/'ko' the reference pathways"
+        ),
         type=str,
-        metavar="ORG"
+        metavar="ORG",
+        nargs="+"
         )
     parser.add_argument(
         "-of",
         "--output-file",
         dest="outputfile",
-        help="output file name",
+        help=(
+            "output file name, with several organisms an {organism} placeholder"
+            " is filled in or the code is appended to the name"
+        ),
         type=str,
         metavar="OUT",
         nargs="?"
         )
+    parser.add_argument(
+        "--format",
+        dest="output_format",
+        help=(
+            "table layout: 'wide' (one column per pathway), 'long' (one pathway and compound per row)"
+            " or long layout in Arrow IPC, Feather or Parquet files (default: wide)"
+        ),
+        choices=OUTPUT_FORMATS,
+        default="wide",
+        )
+    parser.add_argument(
+        "--combined",
+        dest="combined",
+        help="write the pathways of all organisms to one table instead of one table per organism",
+        action="store_true",
+        )
+    parser.add_argument(
+        "--matrix",
+        dest="matrix",
+        help=(
+            "also export each table as a sparse pathway x compound matrix, 'mtx' (Matrix Market)"
+            " or 'npz' (scipy.sparse), with .rows.txt and .cols.txt label files"
+        ),
+        choices=MATRIX_FORMATS,
+        )
+    parser.add_argument(
+        "--graph",
+        dest="graph",
+        help=(
+            "also save each table's compound-reaction graph with per-pathway reaction"
+            " indexes as a memory-mappable <output file>.graph file, requires KGML"
+        ),
+        action="store_true",
+        )
+    parser.add_argument(
+        "--snapshot",
+        dest="snapshot",
+        help=(
+            "also save the compounds of all pulled pathways as a memory-mapped snapshot with a"
+            " compound to pathway index, for lookups with keggpull query or keggpull.Snapshot"
+        ),
+        type=str,
+        metavar="FILE"
+        )
+    parser.add_argument(
+        "--annotate",
+        dest="annotate",
+        help=(
+            f"join these fields of the bulk fetched compound catalog ({', '.join(CATALOG_FIELDS)})"
+            " into the compound table as compound_<field> columns, requires a long or columnar --format"
+        ),
+        choices=CATALOG_FIELDS,
+        nargs="+",
+        metavar="FIELD",
+        )
+    parser.add_argument(
+        "--compound-catalog",
+        dest="compound_catalog",
+        help=(
+            "keep the compound catalog in this local table and reuse it until the KEGG compound"
+            " release changes"
+        ),
+        type=str,
+        metavar="FILE"
+        )
+    parser.add_argument(
+        "-m",
+        "--manifest",
+        dest="manifest",
+        help=(
+            "record the results in this JSON manifest and on later runs only refetch"
+            " pathways that are new or may have changed in a new KEGG release"
+        ),
+        type=str,
+        metavar="FILE"
+        )
+    parser.add_argument(
+        "--checkpoint",
+        dest="checkpoint",
+        help=(
+            "append every completed pathway to this journal, it is removed once all tables are"
+            " written and kept when pathways failed"
+        ),
+        type=str,
+        metavar="FILE"
+        )
+    parser.add_argument(
+        "--resume",
+        dest="resume",
+        help="skip the pathways already completed in the --checkpoint journal of an interrupted run",
+        action="store_true",
+        )
+    parser.add_argument(
+        "-f",
+        "--pathway-format",
+        dest="pathway_format",
+        help=(
+            "pathway document to extract compounds from, 'text' fetches flat files"
+            f" in batches of {MAX_BATCH_SIZE} pathways per request (default: kgml)"
+        ),
+        choices=PATHWAY_FORMATS,
+        default="kgml",
+        )
+    parser.add_argument(
+        "-e",
+        "--entities",
+        dest="entity_types",
+        help=(
+            f"entity types extracted in one pass over each pathway ({', '.join(ENTITY_TYPES)}), every type"
+            " other than compound is written to its own table named <output file>_<type> (default: compound)"
+        ),
+        choices=ENTITY_TYPES,
+        default=["compound"],
+        metavar="TYPE",
+        nargs="+"
+        )
+    parser.add_argument(
+        "-c",
+        "--concurrency",
+        dest="concurrency",
+        help=f"maximum number of in-flight requests (default: {DEFAULT_MAX_IN_FLIGHT})",
+        type=int,
+        default=DEFAULT_MAX_IN_FLIGHT,
+        metavar="N"
+        )
+    parser.add_argument(
+        "-r",
+        "--rate",
+        dest="rate",
+        help=f"maximum requests per second, 0 disables the limit (default: {DEFAULT_RATE})",
+        type=float,
+        default=DEFAULT_RATE,
+        metavar="RATE"
+        )
+    parser.add_argument(
+        "-w",
+        "--workers",
+        dest="workers",
+        help="parse pathways in a pool of N processes, 0 parses in threads of this process (default: 0)",
+        type=int,
+        default=0,
+        metavar="N"
+        )
+    parser.add_argument(
+        "--timeout",
+        dest="timeout",
+        help=f"seconds before a single request is abandoned (default: {DEFAULT_TIMEOUT:g})",
+        type=float,
+        default=DEFAULT_TIMEOUT,
+        metavar="SECONDS"
+        )
+    parser.add_argument(
+        "--retries",
+        dest="retries",
+        help=f"retries for throttled, failed or timed out requests (default: {DEFAULT_RETRIES})",
+        type=int,
+        default=DEFAULT_RETRIES,
+        metavar="N"
+        )
+    parser.add_argument(
+        "--cache-dir",
+        dest="cache_dir",
+        help="cache KEGG responses on disk in this directory and reuse them on later runs",
+        type=str,
+        metavar="DIR"
+        )
+    parser.add_argument(
+        "--cache-ttl",
+        dest="cache_ttl",
+        help=f"days before a cached response is revalidated with KEGG (default: {DEFAULT_TTL_DAYS:g})",
+        type=float,
+        default=DEFAULT_TTL_DAYS,
+        metavar="DAYS"
+        )
+    parser.add_argument(
+        "--cache-size",
+        dest="cache_size",
+        help="evict the least recently used responses once the cache exceeds this many MB",
+        type=float,
+        metavar="MB"
+        )
+    parser.add_argument(
+        "--offline",
+        dest="offline",
+        help="only read responses from the cache, requires --cache-dir",
+        action="store_true",
+        )
+    parser.add_argument(
+        "--report",
+        dest="report",
+        help=(
+            "write a JSON run report with request latencies, bytes, retries, cache hit rate,"
+            " parse times and the wall time and peak memory of each stage"
+        ),
+        type=str,
+        metavar="FILE"
+        )
+    parser.add_argument(
+        "--profile",
+        dest="profile",
+        help="profile the event loop thread with cProfile and save the stats for pstats or snakeviz",
+        type=str,
+        metavar="FILE"
+        )
     parser.add_argument(
         "-v",
         "--verbose",
@@ -57,4 +285,88 @@ def init_parser() -> argparse.ArgumentParser:
         const=logging.DEBUG,
     )
     return parser
-    
+
+
+def init_enrich_parser() -> argparse.ArgumentParser:
+    """Parse the command line parameters of the ``keggpull enrich`` subcommand
+
+    Returns:
+      :obj:`argparse.ArgumentParser`: the subcommand parser
+    """
+    parser = argparse.ArgumentParser(
+        prog="keggpull enrich",
+        description="Test lists of hit compounds for over-representation in the pathways of a KEGGpull table.",
+    )
+    parser.add_argument(
+        "table",
+        help="wide pathway table written by keggpull",
+        type=str,
+        metavar="TABLE"
+        )
+    parser.add_argument(
+        "hits",
+        help="hit lists, one per line: a query name followed by its compound codes",
+        type=str,
+        metavar="HITS"
+        )
+    parser.add_argument(
+        "-of",
+        "--output-file",
+        dest="outputfile",
+        help="output file name (default: enrichment.tsv)",
+        type=str,
+        default="enrichment.tsv",
+        metavar="OUT"
+        )
+    parser.add_argument(
+        "-b",
+        "--background",
+        dest="background",
+        help="file of background compound codes, by default all compounds in the table",
+        type=str,
+        metavar="FILE"
+        )
+    return parser
+
+
+def init_query_parser() -> argparse.ArgumentParser:
+    """Parse the command line parameters of the ``keggpull query`` subcommand
+
+    Returns:
+      :obj:`argparse.ArgumentParser`: the subcommand parser
+    """
+    parser = argparse.ArgumentParser(
+        prog="keggpull query",
+        description="List the organisms and pathways of a snapshot that contain all of the given compounds.",
+    )
+    parser.add_argument(
+        "snapshot",
+        help="snapshot written by keggpull --snapshot",
+        type=str,
+        metavar="SNAPSHOT"
+        )
+    parser.add_argument(
+        "compounds",
+        help="compound codes e.g. C00031, pathways must contain all of them",
+        type=str,
+        metavar="COMPOUND",
+        nargs="+"
+        )
+    parser.add_argument(
+        "-o",
+        "--organism",
+        dest="organism",
+        help="only list pathways of these organisms",
+        type=str,
+        metavar="ORG",
+        nargs="+"
+        )
+    parser.add_argument(
+        "-v",
+        "--verbose",
+        dest="loglevel",
+        help="set loglevel to INFO",
+        action="store_const",
+        const=logging.INFO,
+    )
+    return parser
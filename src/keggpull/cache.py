@@ -0,0 +1,145 @@
+import hashlib
+import json
+import os
+import time
+from dataclasses import dataclass
+from pathlib import Path
+
+from .logger import logger
+
+__author__ = "R-Grosman"
+__copyright__ = "R-Grosman"
+__license__ = "MIT"
+__version__ = "0.2.0"
+
+
+DEFAULT_TTL_DAYS = 30.0
+# Eviction frees space down to this fraction of ``max_size``, so the cache directory is not scanned on every put
+EVICT_LOW_WATER = 0.9
+
+
+@dataclass
+class CacheEntry:
+    """A cached response body with the metadata needed for revalidation"""
+
+    key: str
+    content: bytes
+    fetched: float
+    etag: str | None = None
+    last_modified: str | None = None
+
+    def age(self) -> float:
+        """Seconds since the entry was fetched or last revalidated"""
+        return time.time() - self.fetched
+
+    def revalidation_headers(self) -> dict[str, str]:
+        """Returns the conditional request headers for this entry"""
+        headers = {}
+        if self.etag:
+            headers["If-None-Match"] = self.etag
+        if self.last_modified:
+            headers["If-Modified-Since"] = self.last_modified
+        return headers
+
+
+class ResponseCache:
+    """Content-addressed on-disk cache of KEGG REST responses
+
+    Entries are keyed by the request path, e.g. ``get/hsa00010/kgml`` or
+    ``list/pathway/hsa``, and stored under the SHA-256 of the key. Entries older
+    than ``ttl`` seconds are stale and get revalidated, and once the bodies exceed
+    ``max_size`` bytes the least recently used entries are evicted down to
+    ``EVICT_LOW_WATER`` of it. In ``offline`` mode the cache is the only source
+    and the TTL is ignored.
+    """
+
+    def __init__(
+        self,
+        directory: str | os.PathLike,
+        ttl: float | None = DEFAULT_TTL_DAYS * 86400,
+        max_size: int | None = None,
+        offline: bool = False,
+    ):
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.ttl = ttl
+        self.max_size = max_size
+        self.offline = offline
+        # entries fetched before this time are stale regardless of their age, e.g. after a KEGG release
+        self.not_before = 0.0
+        self._size = sum(path.stat().st_size for path in self.directory.glob("*/*.body"))
+
+    def _paths(self, key: str) -> tuple[Path, Path]:
+        digest = hashlib.sha256(key.encode("utf-8")).hexdigest()
+        base = self.directory / digest[:2] / digest
+        return base.with_suffix(".body"), base.with_suffix(".json")
+
+    def is_fresh(self, entry: CacheEntry) -> bool:
+        """Checks whether an entry can be served without revalidation"""
+        if self.offline:
+            return True
+        return entry.fetched >= self.not_before and (self.ttl is None or entry.age() < self.ttl)
+
+    def get(self, key: str) -> CacheEntry | None:
+        """Returns the entry for ``key`` and marks it as recently used, or None on a miss"""
+        body_path, meta_path = self._paths(key)
+        try:
+            meta = json.loads(meta_path.read_text())
+            content = body_path.read_bytes()
+        except (OSError, ValueError):
+            return None
+        os.utime(body_path)
+        return CacheEntry(key, content, meta["fetched"], meta.get("etag"), meta.get("last_modified"))
+
+    def put(
+        self, key: str, content: bytes, etag: str | None = None, last_modified: str | None = None
+    ) -> CacheEntry:
+        """Stores a response body for ``key`` and evicts old entries if the cache is full"""
+        body_path, meta_path = self._paths(key)
+        body_path.parent.mkdir(exist_ok=True)
+        if body_path.exists():
+            self._size -= body_path.stat().st_size
+        entry = CacheEntry(key, content, time.time(), etag, last_modified)
+        self._write(body_path, content)
+        self._write_meta(meta_path, entry)
+        self._size += len(content)
+        self.evict()
+        return entry
+
+    def refresh(self, entry: CacheEntry) -> CacheEntry:
+        """Resets the age of an entry after the server confirmed it is unchanged"""
+        entry.fetched = time.time()
+        self._write_meta(self._paths(entry.key)[1], entry)
+        return entry
+
+    def evict(self) -> None:
+        """Removes least recently used entries down to ``EVICT_LOW_WATER`` of ``max_size`` once it is exceeded"""
+        if self.max_size is None or self._size <= self.max_size:
+            return
+        low_water = self.max_size * EVICT_LOW_WATER
+        bodies = sorted(
+            ((path.stat(), path) for path in self.directory.glob("*/*.body")),
+            key=lambda item: item[0].st_mtime,
+        )
+        for stat, body_path in bodies:
+            if self._size <= low_water:
+                break
+            body_path.unlink(missing_ok=True)
+            body_path.with_suffix(".json").unlink(missing_ok=True)
+            self._size -= stat.st_size
+            logger.debug(f"Evicted {body_path.name} from the response cache")
+
+    @staticmethod
+    def _write(path: Path, content: bytes) -> None:
+        tmp_path = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+        tmp_path.write_bytes(content)
+        os.replace(tmp_path, path)
+
+    def _write_meta(self, path: Path, entry: CacheEntry) -> None:
+        meta = {
+            "key": entry.key,
+            "fetched": entry.fetched,
+            "etag": entry.etag,
+            "last_modified": entry.last_modified,
+        }
+        self._write(path, json.dumps(meta).encode("utf-8"))
@@ -0,0 +1,153 @@
+import asyncio
+import os
+from collections.abc import Iterable
+
+from . import utilities as utils
+from .client import KEGG_REST_URL, FetchError, KeggClient
+from .logger import logger
+
+__author__ = "R-Grosman"
+__copyright__ = "R-Grosman"
+__license__ = "MIT"
+__version__ = "0.2.0"
+
+
+# Compound properties answered by ``find`` range queries and databases answered by ``conv``
+FIND_FIELDS = ("exact_mass", "mol_weight")
+CROSS_REFERENCES = ("pubchem", "chebi")
+CATALOG_FIELDS = ("name", *FIND_FIELDS, *CROSS_REFERENCES)
+# A range spanning every Compound, so one ``find`` request lists the property of all of them
+FIND_RANGE = "0-100000"
+
+
+def compound_list_url(base_url: str = KEGG_REST_URL) -> str:
+    """Returns the URL for the names of all KEGG Compounds"""
+    return f"{base_url}/list/compound"
+
+
+def compound_find_url(field: str, base_url: str = KEGG_REST_URL) -> str:
+    """Returns the URL for one property of all KEGG Compounds"""
+    return f"{base_url}/find/compound/{FIND_RANGE}/{field}"
+
+
+def conv_url(database: str, base_url: str = KEGG_REST_URL) -> str:
+    """Returns the URL for the cross-references of all KEGG Compounds to an outside database"""
+    return f"{base_url}/conv/{database}/compound"
+
+
+def parse_compound_pairs(text: str, prefix: str = "") -> Iterable[tuple[str, str]]:
+    """Yields (Compound, value) pairs of a two column KEGG response, without ``cpd:`` and ``prefix``"""
+    for line in text.splitlines():
+        compound, _, value = line.partition("\t")
+        if value:
+            yield compound.removeprefix("cpd:"), value.removeprefix(prefix)
+
+
+class CompoundCatalog:
+    """Names, masses and cross-references of all KEGG Compounds, indexed by Compound ID
+
+    Saved as a tab separated table sorted by Compound ID, the first line records
+    the KEGG compound release. Missing values are empty, a Compound with several
+    cross-references to one database lists them separated by commas.
+    """
+
+    def __init__(self, release: str | None = None, records: dict[str, list[str]] | None = None):
+        self.release = release
+        self.records = records or {}
+
+    def __len__(self) -> int:
+        return len(self.records)
+
+    def __contains__(self, compound: str) -> bool:
+        return compound in self.records
+
+    def get(self, compound: str, field: str) -> str:
+        """Returns one field of a Compound, empty if it is unknown"""
+        record = self.records.get(compound)
+        return record[CATALOG_FIELDS.index(field)] if record else ""
+
+    def column(self, field: str) -> dict[str, str]:
+        """Returns the non-empty values of one of the ``CATALOG_FIELDS`` keyed by Compound"""
+        index = CATALOG_FIELDS.index(field)
+        return {compound: record[index] for compound, record in self.records.items() if record[index]}
+
+    @classmethod
+    def load(cls, path: str | os.PathLike) -> "CompoundCatalog":
+        """Reads a catalog table, an empty catalog if the file does not exist"""
+        try:
+            with open(path, "r") as fh:
+                release = fh.readline().rstrip("\n").partition("\t")[2] or None
+                fh.readline()
+                records = {}
+                for line in fh:
+                    compound, *values = line.rstrip("\n").split("\t")
+                    records[compound] = values
+        except FileNotFoundError:
+            return cls()
+        return cls(release, records)
+
+    def save(self, path: str | os.PathLike) -> None:
+        """Writes the catalog table"""
+        with utils.atomic_write(path) as fh:
+            fh.write(f"# kegg_compound_release\t{self.release or ''}\n")
+            fh.write("\t".join(["compound", *CATALOG_FIELDS]) + "\n")
+            for compound in sorted(self.records):
+                fh.write("\t".join([compound, *self.records[compound]]) + "\n")
+
+
+async def _get_text(url: str, client: KeggClient) -> str:
+    response = await client.get(url)
+    if response.status_code != 200:
+        raise FetchError(url, f"status code {response.status_code}")
+    return response.text
+
+
+async def fetch_compound_catalog(client: KeggClient) -> CompoundCatalog:
+    """Fetches the catalog of all KEGG Compounds in one request per field
+
+    Names come from ``list``, the first name of each Compound is kept, masses
+    from ``find`` range queries and cross-references from ``conv``.
+
+    Raises:
+      FetchError: a catalog list could not be fetched
+    """
+    urls = [
+        compound_list_url(client.base_url),
+        *(compound_find_url(field, client.base_url) for field in FIND_FIELDS),
+        *(conv_url(database, client.base_url) for database in CROSS_REFERENCES),
+    ]
+    logger.info(f"Fetching the compound catalog with {len(urls)} requests")
+    texts = await asyncio.gather(*[_get_text(url, client) for url in urls])
+
+    records = {}
+    for compound, names in parse_compound_pairs(texts[0]):
+        records[compound] = [names.split(";")[0].strip()] + [""] * (len(CATALOG_FIELDS) - 1)
+    for index, (field, text) in enumerate(zip(CATALOG_FIELDS[1:], texts[1:]), start=1):
+        prefix = f"{field}:" if field in CROSS_REFERENCES else ""
+        for compound, value in parse_compound_pairs(text, prefix):
+            record = records.setdefault(compound, [""] * len(CATALOG_FIELDS))
+            record[index] = f"{record[index]},{value}" if record[index] else value
+    return CompoundCatalog(records=records)
+
+
+async def load_compound_catalog(client: KeggClient, path: str | os.PathLike | None = None) -> CompoundCatalog:
+    """Returns the compound catalog, reusing the table at ``path`` until the KEGG compound release changes
+
+    The table is also reused when the release cannot be determined, e.g. in
+    offline mode. A fetched catalog is saved to ``path``.
+
+    Raises:
+      FetchError: a catalog list could not be fetched
+    """
+    release = await utils.get_kegg_release(client, "compound")
+    if path:
+        catalog = CompoundCatalog.load(path)
+        if catalog.records and (release is None or catalog.release == release):
+            logger.info(f"Compound catalog reused: {path} ({len(catalog)} compounds, release {catalog.release})")
+            return catalog
+    catalog = await fetch_compound_catalog(client)
+    catalog.release = release
+    if path:
+        catalog.save(path)
+        logger.info(f"Compound catalog created: {path} ({len(catalog)} compounds)")
+    return catalog
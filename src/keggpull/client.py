@@ -0,0 +1,222 @@
+import asyncio
+import random
+import time
+from dataclasses import dataclass, field
+from typing import TYPE_CHECKING
+
+from .cache import ResponseCache
+from .logger import logger
+from .metrics import RunMetrics
+from .scheduler import Scheduler
+
+if TYPE_CHECKING:
+    import aiohttp
+
+__author__ = "R-Grosman"
+__copyright__ = "R-Grosman"
+__license__ = "MIT"
+__version__ = "0.2.0"
+
+
+KEGG_REST_URL = "https://rest.kegg.jp"
+# Throttling and transient server errors worth another attempt, KEGG answers clients it throttles with 403
+RETRY_STATUS_CODES = frozenset({403, 429, 500, 502, 503, 504})
+DEFAULT_TIMEOUT = 60.0
+DEFAULT_RETRIES = 5
+
+
+class FetchError(Exception):
+    """Raised when a request still fails after all retries"""
+
+    def __init__(self, url: str, reason: str):
+        super().__init__(f"{url}: {reason}")
+        self.url = url
+        self.reason = reason
+
+
+@dataclass
+class KeggResponse:
+    """A completed KEGG REST response with its body read into memory and lower-cased header names"""
+
+    url: str
+    status_code: int
+    content: bytes
+    headers: dict[str, str] = field(default_factory=dict)
+    from_cache: bool = False
+
+    @property
+    def text(self) -> str:
+        """The response body decoded as UTF-8"""
+        return self.content.decode("utf-8")
+
+
+class KeggClient:
+    """Async KEGG REST client sharing one pooled keep-alive session across requests
+
+    The base URL and the session are swappable, e.g. to point the client at a
+    local stand-in server in tests or to reuse a session managed elsewhere.
+    Every request goes through the ``scheduler``, which bounds concurrency and
+    the request rate so KEGG does not throttle the run. Timeouts, connection
+    errors and the status codes in ``RETRY_STATUS_CODES`` are retried up to
+    ``retries`` times with exponential backoff and full jitter. With a ``cache``
+    successful responses are stored on disk, fresh entries are served without a
+    request and stale ones are revalidated with a conditional request.
+    Concurrent requests for the same URL share a single fetch. aiohttp is
+    only imported once a client is created.
+    """
+
+    def __init__(
+        self,
+        base_url: str = KEGG_REST_URL,
+        session: "aiohttp.ClientSession | None" = None,
+        scheduler: Scheduler | None = None,
+        connection_limit: int | None = None,
+        keepalive_timeout: float = 30.0,
+        timeout: float = DEFAULT_TIMEOUT,
+        retries: int = DEFAULT_RETRIES,
+        backoff: float = 1.0,
+        max_backoff: float = 60.0,
+        cache: ResponseCache | None = None,
+        metrics: RunMetrics | None = None,
+    ):
+        import aiohttp
+
+        self.base_url = base_url.rstrip("/")
+        self.scheduler = scheduler or Scheduler()
+        self.connection_limit = connection_limit or self.scheduler.max_in_flight
+        self.timeout = aiohttp.ClientTimeout(total=timeout)
+        self.retries = retries
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.cache = cache
+        self.metrics = metrics
+        self.keepalive_timeout = keepalive_timeout
+        self._session = session
+        self._owns_session = session is None
+        self._in_flight: dict[tuple[str, bool], asyncio.Task] = {}
+
+    async def __aenter__(self) -> "KeggClient":
+        self.session  # opens the pooled session up front
+        return self
+
+    async def __aexit__(self, *exc_info) -> None:
+        await self.close()
+
+    @property
+    def session(self) -> "aiohttp.ClientSession":
+        """The shared session, created on first use"""
+        import aiohttp
+
+        if self._session is None or self._session.closed:
+            connector = aiohttp.TCPConnector(
+                limit=self.connection_limit, keepalive_timeout=self.keepalive_timeout
+            )
+            self._session = aiohttp.ClientSession(connector=connector)
+            self._owns_session = True
+        return self._session
+
+    async def close(self) -> None:
+        """Cancels outstanding requests and closes the session if it was created by this client"""
+        for task in list(self._in_flight.values()):
+            task.cancel()
+        if self._owns_session and self._session is not None:
+            await self._session.close()
+        self._session = None
+
+    def backoff_delay(self, attempt: int) -> float:
+        """Returns a full-jitter exponential backoff delay for a zero-based retry attempt"""
+        return random.uniform(0, min(self.max_backoff, self.backoff * 2**attempt))
+
+    def cache_key(self, url: str) -> str:
+        """Returns the cache key of a URL, its path relative to the base URL"""
+        return url.removeprefix(self.base_url).lstrip("/")
+
+    async def get(self, url: str, use_cache: bool = True) -> KeggResponse:
+        """Returns the response for a GET request, from the cache when possible
+
+        With ``use_cache`` False the cache is neither read nor written, e.g. for
+        responses that must always be current, and in offline mode nothing is fetched.
+
+        Raises:
+          FetchError: the request timed out, failed or was throttled on every attempt,
+            or in offline mode the URL is not cached or ``use_cache`` is False
+        """
+        if not use_cache and self.cache is not None and self.cache.offline:
+            raise FetchError(url, "uncached request in offline mode")
+        key = (url, use_cache)
+        task = self._in_flight.get(key)
+        if task is None:
+            task = asyncio.ensure_future(self._get(url) if use_cache else self._fetch(url))
+            self._in_flight[key] = task
+            task.add_done_callback(lambda done: self._forget(key, done))
+        return await asyncio.shield(task)
+
+    def _forget(self, key: tuple[str, bool], task: asyncio.Task) -> None:
+        self._in_flight.pop(key, None)
+        if not task.cancelled():
+            task.exception()  # retrieved here in case every waiter was cancelled
+
+    async def _get(self, url: str) -> KeggResponse:
+        if self.cache is None:
+            return await self._fetch(url)
+
+        key = self.cache_key(url)
+        entry = self.cache.get(key)
+        if entry is not None and self.cache.is_fresh(entry):
+            if self.metrics:
+                self.metrics.cache_hits += 1
+            return KeggResponse(url, 200, entry.content, from_cache=True)
+        if self.metrics:
+            self.metrics.cache_misses += 1
+        if self.cache.offline:
+            raise FetchError(url, "not in the response cache (offline mode)")
+
+        headers = entry.revalidation_headers() if entry is not None else {}
+        response = await self._fetch(url, headers)
+        if response.status_code == 304 and entry is not None:
+            if self.metrics:
+                self.metrics.cache_revalidated += 1
+            self.cache.refresh(entry)
+            return KeggResponse(url, 200, entry.content, response.headers, from_cache=True)
+        if response.status_code == 200:
+            self.cache.put(
+                key, response.content, response.headers.get("etag"), response.headers.get("last-modified")
+            )
+        return response
+
+    async def _get_once(self, url: str, headers: dict[str, str]) -> KeggResponse:
+        async with self.scheduler:
+            logger.debug(f"GET {url}")
+            start = time.perf_counter()
+            size = None
+            try:
+                async with self.session.get(url, headers=headers, timeout=self.timeout) as response:
+                    content = await response.read()
+                    size = len(content)
+                    headers = {name.lower(): value for name, value in response.headers.items()}
+                    return KeggResponse(str(response.url), response.status, content, headers)
+            finally:
+                if self.metrics:
+                    self.metrics.observe_request(time.perf_counter() - start, size)
+
+    async def _fetch(self, url: str, headers: dict[str, str] | None = None) -> KeggResponse:
+        """Sends a GET request over the pooled session, retrying transient failures"""
+        import aiohttp
+
+        for attempt in range(self.retries + 1):
+            try:
+                response = await self._get_once(url, headers or {})
+            except (aiohttp.ClientError, asyncio.TimeoutError) as error:
+                reason = f"{type(error).__name__}: {error}".rstrip(": ")
+            else:
+                if response.status_code not in RETRY_STATUS_CODES:
+                    return response
+                reason = f"status code {response.status_code}"
+            if attempt < self.retries:
+                if self.metrics:
+                    self.metrics.retries += 1
+                delay = self.backoff_delay(attempt)
+                logger.debug(f"Retrying {url} in {delay:.2f}s after {reason}")
+                await asyncio.sleep(delay)
+
+        raise FetchError(url, reason)
@@ -0,0 +1,98 @@
+from array import array
+from collections.abc import Iterable, Iterator
+
+__author__ = "R-Grosman"
+__copyright__ = "R-Grosman"
+__license__ = "MIT"
+__version__ = "0.2.0"
+
+
+class CompoundDictionary:
+    """Maps Compound IDs like ``C00022`` to dense integer IDs in order of first appearance
+
+    Each Compound ID is stored once, so decoded lists share their strings.
+    """
+
+    def __init__(self, compounds: Iterable[str] = ()):
+        self.compounds: list[str] = []
+        self._ids: dict[str, int] = {}
+        for compound in compounds:
+            self.encode(compound)
+
+    def __len__(self) -> int:
+        return len(self.compounds)
+
+    def __contains__(self, compound: str) -> bool:
+        return compound in self._ids
+
+    def encode(self, compound: str) -> int:
+        """Returns the integer ID of a Compound, assigning the next free ID to new ones"""
+        compound_id = self._ids.get(compound)
+        if compound_id is None:
+            compound_id = self._ids[compound] = len(self.compounds)
+            self.compounds.append(compound)
+        return compound_id
+
+    def encode_all(self, compounds: Iterable[str]) -> array:
+        """Returns the integer IDs of Compounds as an ``array('I')``"""
+        return array("I", map(self.encode, compounds))
+
+    def lookup(self, compound: str) -> int | None:
+        """Returns the integer ID of a known Compound without assigning new IDs"""
+        return self._ids.get(compound)
+
+    def decode(self, compound_ids: Iterable[int]) -> Iterator[str]:
+        """Yields the Compound IDs for integer IDs"""
+        return map(self.compounds.__getitem__, compound_ids)
+
+
+class PathwayMembership:
+    """Compact pathway to Compound membership in CSR layout
+
+    The integer Compound IDs of the ``i``-th pathway are
+    ``indices[offsets[i]:offsets[i + 1]]``, in the order they were extracted.
+    """
+
+    def __init__(self, dictionary: CompoundDictionary | None = None):
+        self.dictionary = dictionary if dictionary is not None else CompoundDictionary()
+        self.pathways: list[str] = []
+        self.offsets = array("Q", [0])
+        self.indices = array("I")
+        self._rows: dict[str, int] = {}
+
+    def __len__(self) -> int:
+        return len(self.pathways)
+
+    def __contains__(self, pathway_code: str) -> bool:
+        return pathway_code in self._rows
+
+    def add(self, pathway_code: str, compounds: Iterable[str]) -> None:
+        """Appends the Compounds of a pathway
+
+        Raises:
+          ValueError: the pathway was already added
+        """
+        if pathway_code in self._rows:
+            raise ValueError(f"{pathway_code} is already in the membership table")
+        self._rows[pathway_code] = len(self.pathways)
+        self.pathways.append(pathway_code)
+        self.indices.extend(self.dictionary.encode_all(compounds))
+        self.offsets.append(len(self.indices))
+
+    def compound_ids(self, pathway_code: str) -> memoryview:
+        """Returns a zero-copy view of the integer Compound IDs of a pathway"""
+        row = self._rows[pathway_code]
+        return memoryview(self.indices)[self.offsets[row] : self.offsets[row + 1]]
+
+    def compounds(self, pathway_code: str) -> list[str]:
+        """Returns the Compound IDs of a pathway"""
+        return list(self.dictionary.decode(self.compound_ids(pathway_code)))
+
+    def compound_set(self, pathway_code: str) -> set[int]:
+        """Returns the distinct integer Compound IDs of a pathway"""
+        return set(self.compound_ids(pathway_code))
+
+    def columns(self, pathway_codes: Iterable[str] | None = None) -> Iterator[tuple[str, Iterator[str]]]:
+        """Yields (path code, Compound iterator) pairs, decoding lazily for streaming writers"""
+        for pathway_code in self.pathways if pathway_codes is None else pathway_codes:
+            yield pathway_code, self.dictionary.decode(self.compound_ids(pathway_code))
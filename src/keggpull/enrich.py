@@ -0,0 +1,176 @@
+import argparse
+import re
+from collections.abc import Iterable, Iterator
+from dataclasses import dataclass
+
+try:
+    import numpy as np
+    import scipy.sparse
+    import scipy.stats
+except ImportError as error:  # pragma: no cover
+    raise ImportError(
+        "Enrichment requires NumPy and SciPy, install them with: pip install KEGGpull[enrich]"
+    ) from error
+
+from . import utilities as utils
+from .compounds import PathwayMembership
+from .export import SparseMatrix, build_matrix
+from .logger import logger
+
+__author__ = "R-Grosman"
+__copyright__ = "R-Grosman"
+__license__ = "MIT"
+__version__ = "0.2.0"
+
+
+# Queries tested per vectorised block, bounds the dense query x pathway arrays
+QUERY_BLOCK_SIZE = 256
+
+
+@dataclass
+class EnrichmentResult:
+    """Over-representation statistics of every query against every pathway
+
+    All arrays are queries x pathways except ``pathway_sizes`` (pathways) and
+    ``query_sizes`` (queries), sizes count only Compounds in the background.
+    """
+
+    queries: list[str]
+    pathways: list[str]
+    overlaps: np.ndarray
+    pathway_sizes: np.ndarray
+    query_sizes: np.ndarray
+    background_size: int
+    pvalues: np.ndarray
+    qvalues: np.ndarray
+
+
+def to_scipy(matrix: SparseMatrix) -> scipy.sparse.csr_matrix:
+    """Converts a membership matrix to a binary ``scipy.sparse`` CSR matrix without copying the indices"""
+    return scipy.sparse.csr_matrix(
+        (
+            np.ones(matrix.nnz, dtype=np.int32),
+            np.frombuffer(matrix.indices, dtype=np.uint32),
+            np.frombuffer(matrix.indptr, dtype=np.uint64),
+        ),
+        shape=matrix.shape,
+    )
+
+
+def benjamini_hochberg(pvalues: np.ndarray) -> np.ndarray:
+    """Returns Benjamini-Hochberg adjusted p-values along the last axis"""
+    tests = pvalues.shape[-1]
+    if tests == 0:
+        return pvalues.copy()
+    order = np.argsort(pvalues, axis=-1)
+    ranked = np.take_along_axis(pvalues, order, axis=-1) * tests / np.arange(1, tests + 1)
+    ranked = np.minimum.accumulate(ranked[..., ::-1], axis=-1)[..., ::-1]
+    qvalues = np.empty_like(ranked)
+    np.put_along_axis(qvalues, order, np.minimum(ranked, 1.0), axis=-1)
+    return qvalues
+
+
+def enrich(
+    matrix: SparseMatrix,
+    queries: dict[str, Iterable[str]],
+    background: Iterable[str] | None = None,
+) -> EnrichmentResult:
+    """Tests every query for over-representation in every pathway with the hypergeometric test
+
+    The background defaults to all Compounds in ``matrix``, Compounds outside of
+    it are ignored in queries and pathways. P-values are FDR adjusted per query
+    across all pathways.
+    """
+    column_of = {compound: column for column, compound in enumerate(matrix.columns)}
+    in_background = np.ones(len(matrix.columns), dtype=bool)
+    if background is not None:
+        in_background[:] = False
+        in_background[[column_of[compound] for compound in background if compound in column_of]] = True
+
+    pathways = to_scipy(matrix)[:, in_background]
+    query_rows = []
+    query_columns = []
+    for row, compounds in enumerate(queries.values()):
+        columns = {column_of[compound] for compound in compounds if compound in column_of}
+        query_columns.extend(columns)
+        query_rows.extend([row] * len(columns))
+    hits = scipy.sparse.csr_matrix(
+        (np.ones(len(query_rows), dtype=np.int32), (query_rows, query_columns)),
+        shape=(len(queries), len(matrix.columns)),
+    )[:, in_background]
+
+    background_size = int(in_background.sum())
+    overlaps = np.asarray((hits @ pathways.T).todense())
+    pathway_sizes = np.asarray(pathways.sum(axis=1)).ravel()
+    query_sizes = np.asarray(hits.sum(axis=1)).ravel()
+    pvalues = scipy.stats.hypergeom.sf(
+        overlaps - 1, background_size, pathway_sizes[np.newaxis, :], query_sizes[:, np.newaxis]
+    )
+    pvalues = np.where(overlaps > 0, pvalues, 1.0)
+    return EnrichmentResult(
+        list(queries),
+        matrix.rows,
+        overlaps,
+        pathway_sizes,
+        query_sizes,
+        background_size,
+        pvalues,
+        benjamini_hochberg(pvalues),
+    )
+
+
+def read_wide_table(input_file: str) -> PathwayMembership:
+    """Reads a wide table written by KEGGpull back into pathway memberships"""
+    with open(input_file, "r") as fh:
+        pathway_codes = fh.readline().rstrip("\n").split("\t")
+        columns = [[] for _ in pathway_codes]
+        for line in fh:
+            for column, compound in zip(columns, line.rstrip("\n").split("\t")):
+                if compound:
+                    column.append(compound)
+    membership = PathwayMembership()
+    for pathway_code, compounds in zip(pathway_codes, columns):
+        membership.add(pathway_code, compounds)
+    return membership
+
+
+def read_queries(input_file: str) -> dict[str, list[str]]:
+    """Reads hit lists, one per line: a query name followed by its Compound IDs"""
+    queries = {}
+    with open(input_file, "r") as fh:
+        for line in fh:
+            fields = re.split(r"[\t ,]+", line.strip())
+            if fields[0]:
+                queries[fields[0]] = fields[1:]
+    return queries
+
+
+def result_rows(result: EnrichmentResult) -> Iterator[str]:
+    """Yields tab separated rows for every query and pathway that overlap, by query and p-value"""
+    for row, query in enumerate(result.queries):
+        hit_columns = np.flatnonzero(result.overlaps[row])
+        for column in hit_columns[np.argsort(result.pvalues[row, hit_columns], kind="stable")]:
+            yield (
+                f"{query}\t{result.pathways[column]}\t{result.overlaps[row, column]}"
+                f"\t{result.pathway_sizes[column]}\t{result.query_sizes[row]}\t{result.background_size}"
+                f"\t{result.pvalues[row, column]:.6g}\t{result.qvalues[row, column]:.6g}\n"
+            )
+
+
+def run_enrichment(args: argparse.Namespace) -> None:
+    """Runs the ``keggpull enrich`` subcommand"""
+    matrix = build_matrix(read_wide_table(args.table))
+    queries = read_queries(args.hits)
+    background = None
+    if args.background:
+        with open(args.background, "r") as fh:
+            background = fh.read().split()
+    logger.info(f"Testing {len(queries)} queries against {len(matrix.rows)} pathways")
+
+    with open(args.outputfile, "w") as fh:
+        fh.write("query\tpathway\toverlap\tpathway_size\tquery_size\tbackground_size\tpvalue\tqvalue\n")
+        names = list(queries)
+        for block in utils.batched(names, QUERY_BLOCK_SIZE):
+            result = enrich(matrix, {name: queries[name] for name in block}, background)
+            fh.writelines(result_rows(result))
+    logger.info(f"Enrichment results created: {args.outputfile}")
@@ -0,0 +1,110 @@
+from array import array
+from collections.abc import Iterable
+from dataclasses import dataclass
+
+from .compounds import PathwayMembership
+from .logger import logger
+
+__author__ = "R-Grosman"
+__copyright__ = "R-Grosman"
+__license__ = "MIT"
+__version__ = "0.2.0"
+
+
+MATRIX_FORMATS = ("mtx", "npz")
+
+
+@dataclass
+class SparseMatrix:
+    """Binary pathway x Compound membership matrix in CSR layout with its row and column labels
+
+    The columns of row ``i`` are ``indices[indptr[i]:indptr[i + 1]]``, sorted and distinct.
+    """
+
+    rows: list[str]
+    columns: list[str]
+    indptr: array
+    indices: array
+
+    @property
+    def shape(self) -> tuple[int, int]:
+        return len(self.rows), len(self.columns)
+
+    @property
+    def nnz(self) -> int:
+        return len(self.indices)
+
+
+def build_matrix(membership: PathwayMembership, pathway_codes: Iterable[str] | None = None) -> SparseMatrix:
+    """Builds the membership matrix of the given pathways, by default all of them
+
+    Columns are the Compounds that occur in those pathways, sorted by Compound ID.
+    """
+    rows = list(membership.pathways if pathway_codes is None else pathway_codes)
+    row_ids = [membership.compound_set(pathway_code) for pathway_code in rows]
+    used_ids = sorted(set().union(*row_ids), key=membership.dictionary.compounds.__getitem__)
+    column_of = {compound_id: column for column, compound_id in enumerate(used_ids)}
+
+    indptr = array("Q", [0])
+    indices = array("I")
+    for compound_ids in row_ids:
+        indices.extend(sorted(column_of[compound_id] for compound_id in compound_ids))
+        indptr.append(len(indices))
+    return SparseMatrix(rows, list(membership.dictionary.decode(used_ids)), indptr, indices)
+
+
+def write_labels(labels: list[str], output_file: str) -> None:
+    """Writes one label per line"""
+    with open(output_file, "w") as fh:
+        fh.writelines(f"{label}\n" for label in labels)
+
+
+def write_matrix_market(matrix: SparseMatrix, output_file: str) -> None:
+    """Writes the matrix as a Matrix Market coordinate file with 1-based indices and values of 1"""
+    with open(output_file, "w") as fh:
+        fh.write("%%MatrixMarket matrix coordinate integer general\n")
+        fh.write(f"{matrix.shape[0]} {matrix.shape[1]} {matrix.nnz}\n")
+        for row in range(len(matrix.rows)):
+            fh.writelines(
+                f"{row + 1} {column + 1} 1\n"
+                for column in matrix.indices[matrix.indptr[row] : matrix.indptr[row + 1]]
+            )
+
+
+def write_npz(matrix: SparseMatrix, output_file: str) -> None:
+    """Writes the matrix as a ``scipy.sparse`` CSR matrix in NPZ format
+
+    Raises:
+      ImportError: SciPy is not installed, it comes with ``pip install KEGGpull[matrix]``
+    """
+    try:
+        import numpy as np
+        import scipy.sparse
+    except ImportError as error:
+        raise ImportError("NPZ matrices require SciPy, install it with: pip install KEGGpull[matrix]") from error
+
+    csr = scipy.sparse.csr_matrix(
+        (
+            np.ones(matrix.nnz, dtype=np.int8),
+            np.frombuffer(matrix.indices, dtype=np.uint32),
+            np.frombuffer(matrix.indptr, dtype=np.uint64),
+        ),
+        shape=matrix.shape,
+    )
+    scipy.sparse.save_npz(output_file, csr)
+
+
+def export_matrix(matrix: SparseMatrix, prefix: str, matrix_format: str = "mtx") -> str:
+    """Writes the matrix as ``<prefix>.<format>`` with ``<prefix>.rows.txt`` and ``<prefix>.cols.txt`` labels
+
+    Returns the name of the matrix file.
+    """
+    output_file = f"{prefix}.{matrix_format}"
+    if matrix_format == "npz":
+        write_npz(matrix, output_file)
+    else:
+        write_matrix_market(matrix, output_file)
+    write_labels(matrix.rows, f"{prefix}.rows.txt")
+    write_labels(matrix.columns, f"{prefix}.cols.txt")
+    logger.info(f"Matrix created: {output_file} ({matrix.shape[0]} x {matrix.shape[1]}, {matrix.nnz} entries)")
+    return output_file
@@ -0,0 +1,235 @@
+import os
+from array import array
+from collections.abc import Iterable
+from dataclasses import dataclass
+
+from .compounds import PathwayMembership
+from .kgml import COMPOUND_RE, IRREVERSIBLE_ARROW, REVERSIBLE_ARROW
+from .logger import logger
+from .packed import PackedFile, csr, write_packed
+
+__author__ = "R-Grosman"
+__copyright__ = "R-Grosman"
+__license__ = "MIT"
+__version__ = "0.2.0"
+
+
+GRAPH_KIND = "reaction_graph"
+# CSR index arrays and the offsets array that slices them
+ADJACENCY = {
+    "substrates": "substrate_offsets",
+    "products": "product_offsets",
+    "consumers": "consumer_offsets",
+    "producers": "producer_offsets",
+    "pathway_reactions": "pathway_offsets",
+}
+
+
+@dataclass
+class Equation:
+    """The substrates and products of one reaction"""
+
+    reaction: str
+    substrates: list[str]
+    products: list[str]
+    reversible: bool
+
+
+def parse_equation(equation: str) -> Equation:
+    """Parses an equation extracted from KGML, e.g. ``R01070: C05378 <=> C00111 + C00118``"""
+    reaction, sides = equation.split(": ", 1)
+    reversible = f" {REVERSIBLE_ARROW} " in f" {sides} "
+    left, right = sides.split(REVERSIBLE_ARROW if reversible else IRREVERSIBLE_ARROW, 1)
+    return Equation(reaction, COMPOUND_RE.findall(left), COMPOUND_RE.findall(right), reversible)
+
+
+def merge_equation(merged: Equation, equation: Equation) -> None:
+    """Merges another map's equation of the same reaction into ``merged``
+
+    Maps can list different Compounds of a reaction, which are added to their
+    side, or draw it in the opposite direction, which makes it reversible.
+    """
+    substrates, products = equation.substrates, equation.products
+    if set(substrates) & set(merged.products) and not set(substrates) & set(merged.substrates):
+        substrates, products = products, substrates
+        merged.reversible = True
+    merged.substrates.extend(compound for compound in substrates if compound not in merged.substrates)
+    merged.products.extend(compound for compound in products if compound not in merged.products)
+    merged.reversible = merged.reversible or equation.reversible
+
+
+class ReactionGraph:
+    """Bipartite Compound-reaction graph of a set of pathways in CSR layout
+
+    Compounds, reactions and pathways are addressed by their index in the
+    sorted ``compounds`` and ``reactions`` and the given ``pathways``. The
+    ``ADJACENCY`` arrays map reactions to their substrates and products,
+    Compounds to the reactions that can consume or produce them (both for
+    reversible reactions) and pathways to their reactions, so a pathway's
+    subgraph is a slice. Arrays are ``array`` objects when built and zero-copy
+    views into the file when loaded.
+    """
+
+    def __init__(
+        self,
+        compounds: list[str],
+        reactions: list[str],
+        pathways: list[str],
+        arrays: dict[str, array | memoryview],
+        metadata: dict | None = None,
+    ):
+        self.compounds = compounds
+        self.reactions = reactions
+        self.pathways = pathways
+        self.arrays = arrays
+        self.metadata = metadata or {}
+        self.compound_index = {compound: index for index, compound in enumerate(compounds)}
+        self.reaction_index = {reaction: index for index, reaction in enumerate(reactions)}
+        self.pathway_index = {pathway: index for index, pathway in enumerate(pathways)}
+        self._file: PackedFile | None = None
+
+    @classmethod
+    def load(cls, path: str | os.PathLike) -> "ReactionGraph":
+        """Memory-maps a graph written by ``save``
+
+        Raises:
+          ValueError: the file is not a reaction graph
+        """
+        packed = PackedFile(path, GRAPH_KIND)
+        header = packed.header
+        graph = cls(header["compounds"], header["reactions"], header["pathways"], packed.arrays, header["metadata"])
+        graph._file = packed
+        return graph
+
+    def save(self, path: str | os.PathLike) -> None:
+        """Writes the graph as a packed file that ``load`` memory-maps"""
+        arrays = {
+            name: values if isinstance(values, array) else array(values.format, values)
+            for name, values in self.arrays.items()
+        }
+        write_packed(
+            path,
+            GRAPH_KIND,
+            arrays,
+            compounds=self.compounds,
+            reactions=self.reactions,
+            pathways=self.pathways,
+            metadata=self.metadata,
+        )
+
+    def close(self) -> None:
+        """Unmaps a loaded graph"""
+        if self._file is not None:
+            self._file.close()
+
+    def __enter__(self) -> "ReactionGraph":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    @property
+    def edges(self) -> int:
+        """Number of substrate and product edges"""
+        return len(self.arrays["substrates"]) + len(self.arrays["products"])
+
+    def _row(self, name: str, index: int) -> memoryview:
+        offsets = self.arrays[ADJACENCY[name]]
+        return memoryview(self.arrays[name])[offsets[index] : offsets[index + 1]]
+
+    def is_reversible(self, reaction: str) -> bool:
+        """Checks whether a reaction runs in both directions"""
+        return bool(self.arrays["reversible"][self.reaction_index[reaction]])
+
+    def substrates(self, reaction: str) -> list[str]:
+        """Returns the substrate Compounds of a reaction"""
+        return [self.compounds[index] for index in self._row("substrates", self.reaction_index[reaction])]
+
+    def products(self, reaction: str) -> list[str]:
+        """Returns the product Compounds of a reaction"""
+        return [self.compounds[index] for index in self._row("products", self.reaction_index[reaction])]
+
+    def consumers(self, compound: str) -> list[str]:
+        """Returns the reactions that can consume a Compound"""
+        return [self.reactions[index] for index in self._row("consumers", self.compound_index[compound])]
+
+    def producers(self, compound: str) -> list[str]:
+        """Returns the reactions that can produce a Compound"""
+        return [self.reactions[index] for index in self._row("producers", self.compound_index[compound])]
+
+    def pathway_reactions(self, pathway_code: str) -> list[str]:
+        """Returns the reactions of one pathway"""
+        return [self.reactions[index] for index in self._row("pathway_reactions", self.pathway_index[pathway_code])]
+
+    def successors(self, compound: str) -> set[str]:
+        """Returns the Compounds one reaction step downstream of a Compound"""
+        successors = set()
+        compound_id = self.compound_index[compound]
+        for reaction_id in self._row("consumers", compound_id):
+            substrates = self._row("substrates", reaction_id)
+            if compound_id in substrates:
+                successors.update(self._row("products", reaction_id))
+            if self.arrays["reversible"][reaction_id] and compound_id in self._row("products", reaction_id):
+                successors.update(substrates)
+        successors.discard(compound_id)
+        return {self.compounds[index] for index in successors}
+
+
+def build_reaction_graph(
+    equations: PathwayMembership,
+    pathway_codes: Iterable[str] | None = None,
+    metadata: dict | None = None,
+) -> ReactionGraph:
+    """Builds the reaction graph of the given pathways, by default all, from their extracted equations
+
+    A reaction drawn differently in several maps gets the merged equation of all of them.
+    """
+    pathways = list(equations.pathways if pathway_codes is None else pathway_codes)
+    parsed = {}
+    pathway_equations = []
+    for pathway_code in pathways:
+        pathway_equations.append([parse_equation(equation) for equation in equations.compounds(pathway_code)])
+        for equation in pathway_equations[-1]:
+            if equation.reaction in parsed:
+                merge_equation(parsed[equation.reaction], equation)
+            else:
+                parsed[equation.reaction] = Equation(
+                    equation.reaction, list(equation.substrates), list(equation.products), equation.reversible
+                )
+
+    reactions = sorted(parsed)
+    reaction_index = {reaction: index for index, reaction in enumerate(reactions)}
+    compounds = sorted(
+        {compound for equation in parsed.values() for compound in (*equation.substrates, *equation.products)}
+    )
+    compound_index = {compound: index for index, compound in enumerate(compounds)}
+
+    consumers = [[] for _ in compounds]
+    producers = [[] for _ in compounds]
+    for reaction_id, reaction in enumerate(reactions):
+        equation = parsed[reaction]
+        for compound in equation.substrates:
+            consumers[compound_index[compound]].append(reaction_id)
+            if equation.reversible:
+                producers[compound_index[compound]].append(reaction_id)
+        for compound in equation.products:
+            producers[compound_index[compound]].append(reaction_id)
+            if equation.reversible:
+                consumers[compound_index[compound]].append(reaction_id)
+
+    arrays = {}
+    arrays["substrate_offsets"], arrays["substrates"] = csr(
+        [compound_index[compound] for compound in parsed[reaction].substrates] for reaction in reactions
+    )
+    arrays["product_offsets"], arrays["products"] = csr(
+        [compound_index[compound] for compound in parsed[reaction].products] for reaction in reactions
+    )
+    arrays["reversible"] = array("B", [parsed[reaction].reversible for reaction in reactions])
+    arrays["consumer_offsets"], arrays["consumers"] = csr(sorted(set(row)) for row in consumers)
+    arrays["producer_offsets"], arrays["producers"] = csr(sorted(set(row)) for row in producers)
+    arrays["pathway_offsets"], arrays["pathway_reactions"] = csr(
+        sorted({reaction_index[equation.reaction] for equation in row}) for row in pathway_equations
+    )
+    graph = ReactionGraph(compounds, reactions, pathways, arrays, metadata)
+    logger.info(f"Reaction graph built: {len(compounds)} compounds, {len(reactions)} reactions, {graph.edges} edges")
+    return graph
@@ -0,0 +1,103 @@
+import json
+import os
+import time
+from dataclasses import asdict
+
+from .logger import logger
+from .manifest import ManifestEntry
+from .utilities import ExtractedPathway
+
+__author__ = "R-Grosman"
+__copyright__ = "R-Grosman"
+__license__ = "MIT"
+__version__ = "0.2.0"
+
+
+class Journal:
+    """Append-only checkpoint of the pathways completed in a run, one JSON line each
+
+    The first line records the KEGG release and the entity types, every
+    following line one ``ManifestEntry``. Lines are flushed as they are
+    written, so after a crash only the pathway being written can be lost, and
+    a torn last line is skipped when the journal is loaded.
+    """
+
+    def __init__(self, path: str | os.PathLike, release: str | None, entity_types: list[str]):
+        self.path = path
+        self.header = {"release": release, "entity_types": list(entity_types)}
+        self._fh = None
+
+    def load(self) -> dict[str, ManifestEntry]:
+        """Returns the pathways completed by a previous run, none if it pulled another release or entity types"""
+        try:
+            with open(self.path, "r") as fh:
+                lines = fh.read().splitlines()
+        except FileNotFoundError:
+            return {}
+        try:
+            header = json.loads(lines[0]) if lines else None
+        except ValueError:
+            header = None
+        if header != self.header:
+            logger.warning(f"Ignoring checkpoint {self.path}, it was written for {header}")
+            return {}
+
+        entries = {}
+        for line in lines[1:]:
+            try:
+                entry = ManifestEntry(**json.loads(line))
+            except (ValueError, TypeError):
+                logger.warning(f"Skipping a torn line in checkpoint {self.path}")
+                continue
+            entries[entry.pathway_code] = entry
+        return entries
+
+    def open(self, append: bool = False) -> None:
+        """Opens the journal for writing, continuing the existing one if ``append``
+
+        A torn last line left by a crash is cut off before appending.
+        """
+        if append:
+            self._truncate_torn_line()
+            self._fh = open(self.path, "a")
+            return
+        self._fh = open(self.path, "w")
+        self._write(self.header)
+
+    def append(self, pathway: ExtractedPathway | ManifestEntry) -> None:
+        """Records a completed pathway"""
+        if isinstance(pathway, ExtractedPathway):
+            pathway = ManifestEntry(
+                pathway.pathway_code, pathway.content_hash, time.time(), pathway.compounds, pathway.entities
+            )
+        self._write(asdict(pathway))
+
+    def _truncate_torn_line(self, block_size: int = 4096) -> None:
+        with open(self.path, "rb+") as fh:
+            position = fh.seek(0, os.SEEK_END)
+            while position > 0:
+                start = max(0, position - block_size)
+                fh.seek(start)
+                newline = fh.read(position - start).rfind(b"\n")
+                if newline >= 0:
+                    fh.truncate(start + newline + 1)
+                    return
+                position = start
+            fh.truncate(0)
+
+    def _write(self, record: dict) -> None:
+        self._fh.write(json.dumps(record) + "\n")
+        self._fh.flush()
+
+    def close(self) -> None:
+        if self._fh is not None:
+            self._fh.close()
+            self._fh = None
+
+    def remove(self) -> None:
+        """Closes and deletes the journal once its results are written"""
+        self.close()
+        try:
+            os.remove(self.path)
+        except FileNotFoundError:
+            pass
@@ -0,0 +1,110 @@
+import re
+import xml.etree.ElementTree as ET
+from collections.abc import Iterable, Iterator
+
+__author__ = "R-Grosman"
+__copyright__ = "R-Grosman"
+__license__ = "MIT"
+__version__ = "0.2.0"
+
+
+COMPOUND_RE = re.compile("C[0-9]{5}")
+CHUNK_SIZE = 64 * 1024
+ENTITY_TYPES = ("compound", "gene", "ortholog", "reaction", "equation", "map", "relation")
+# Database prefixes stripped from entry names, genes keep their organism prefix
+ENTRY_PREFIXES = {"gene": "", "ortholog": "ko:", "map": "path:"}
+REVERSIBLE_ARROW = "<=>"
+IRREVERSIBLE_ARROW = "=>"
+
+
+def iter_chunks(document: str | bytes, chunk_size: int = CHUNK_SIZE) -> Iterator[str | bytes]:
+    """Yields a document in slices of ``chunk_size`` characters or bytes"""
+    for start in range(0, len(document), chunk_size):
+        yield document[start : start + chunk_size]
+
+
+def iter_kgml_compounds(chunks: Iterable[str | bytes]) -> Iterator[str]:
+    """Streams the Compound IDs of a KGML document fed as chunks through a pull parser
+
+    Compounds are yielded as soon as the start tag of their ``entry`` has been
+    read, and every top-level element is discarded once it ends, so memory use
+    follows the number of compounds rather than the size of the document.
+
+    Raises:
+      ET.ParseError: the document is not well-formed XML
+    """
+    for _, compound in iter_kgml_entities(chunks, ("compound",)):
+        yield compound
+
+
+def iter_kgml_entities(
+    chunks: Iterable[str | bytes], entity_types: Iterable[str] = ENTITY_TYPES
+) -> Iterator[tuple[str, str]]:
+    """Streams (entity type, ID) pairs of the selected ``ENTITY_TYPES`` out of one pass over a KGML document
+
+    IDs are Compound IDs (``C00022``), genes with their organism prefix
+    (``hsa:226``), KOs (``K01905``), reactions (``R01070``), linked maps
+    (``hsa00020``) and relations as ``<entry1 name>|<type>|<entry2 name>``.
+    Equations are the substrates and products of each reaction as
+    ``R01070: C05378 <=> C00111 + C00118``, with ``=>`` for irreversible ones.
+
+    Raises:
+      ET.ParseError: the document is not well-formed XML
+    """
+    parser = ET.XMLPullParser(events=("start", "end"))
+    state = {"depth": 0, "root": None, "entity_types": frozenset(entity_types), "names": {}}
+    for chunk in chunks:
+        parser.feed(chunk)
+        yield from _read_entity_events(parser, state)
+    parser.close()
+    yield from _read_entity_events(parser, state)
+
+
+def _read_entity_events(parser: ET.XMLPullParser, state: dict) -> Iterator[tuple[str, str]]:
+    for event, element in parser.read_events():
+        if event == "start":
+            if state["root"] is None:
+                state["root"] = element
+            elif state["depth"] == 1:
+                yield from _element_entities(element, state)
+            state["depth"] += 1
+        else:
+            state["depth"] -= 1
+            if state["depth"] == 1:
+                if element.tag == "reaction" and "equation" in state["entity_types"]:
+                    for equation in reaction_equations(element):
+                        yield "equation", equation
+                state["root"].clear()
+
+
+def _element_entities(element: ET.Element, state: dict) -> Iterator[tuple[str, str]]:
+    entity_types = state["entity_types"]
+    name = element.get("name", "")
+    if element.tag == "entry":
+        entry_type = element.get("type")
+        if "relation" in entity_types:
+            state["names"][element.get("id")] = name
+        if entry_type == "compound" and entry_type in entity_types:
+            for compound in COMPOUND_RE.findall(name):
+                yield entry_type, compound
+        elif entry_type in ENTRY_PREFIXES and entry_type in entity_types:
+            for entity in name.split():
+                yield entry_type, entity.removeprefix(ENTRY_PREFIXES[entry_type])
+    elif element.tag == "reaction" and "reaction" in entity_types:
+        for reaction in name.split():
+            yield "reaction", reaction.removeprefix("rn:")
+    elif element.tag == "relation" and "relation" in entity_types:
+        entry1, entry2 = element.get("entry1"), element.get("entry2")
+        names = state["names"]
+        yield "relation", f"{names.get(entry1, entry1)}|{element.get('type')}|{names.get(entry2, entry2)}"
+
+
+def reaction_equations(element: ET.Element) -> Iterator[str]:
+    """Yields one equation per reaction name of a complete KGML ``reaction`` element"""
+    substrates, products = (
+        " + ".join(compound for child in element.iter(tag) for compound in COMPOUND_RE.findall(child.get("name", "")))
+        for tag in ("substrate", "product")
+    )
+    arrow = REVERSIBLE_ARROW if element.get("type") == "reversible" else IRREVERSIBLE_ARROW
+    for reaction in element.get("name", "").split():
+        yield f"{reaction.removeprefix('rn:')}: {substrates} {arrow} {products}"
@@ -1,5 +1,4 @@
 import logging
-import sys
 
 __author__ = "R-Grosman"
 __copyright__ = "R-Grosman"
@@ -7,8 +6,9 @@ __license__ = "MIT"
 __version__ = "0.2.0"
 
 
-logging.basicConfig(
-    level=logging.INFO, format="%(asctime)s - %(name)s - %(levelname)s - %(message)s"
-)
 logger = logging.getLogger(__name__)
-logger.addHandler(logging.StreamHandler(sys.stdout))
\ No newline at end of file
+
+
+def setup_logging(level: int = logging.INFO) -> None:
+    """Sends log records to stderr, called by the command line, the library leaves logging to the application"""
+    logging.basicConfig(level=level, format="%(asctime)s - %(name)s - %(levelname)s - %(message)s")
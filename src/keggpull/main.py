@@ -1,67 +1,354 @@
 import asyncio
+import os
 import sys
-import xml.etree.ElementTree as ET
+import time
 import argparse
-from tqdm.asyncio import tqdm_asyncio
+from contextlib import nullcontext
 from datetime import datetime
 
-from .argparser import init_parser
+from .argparser import init_enrich_parser, init_parser, init_query_parser
 from . import utilities as utils
-from .logger import logger
+from .cache import ResponseCache
+from .catalog import load_compound_catalog
+from .journal import Journal
+from .manifest import Manifest
+from .metrics import RunMetrics
+from .pipeline import PROCESS_CHUNK_SIZE, build_executor, pull_pathways
+from .client import FetchError, KeggClient
+from .compounds import PathwayMembership
+from .export import build_matrix, export_matrix
+from .graph import build_reaction_graph
+from .scheduler import Scheduler
+from .snapshot import write_snapshot
+from .writer import COLUMNAR_FORMATS, OUTPUT_EXTENSIONS, write_table
+from .logger import logger, setup_logging
 
 __author__ = "R-Grosman"
 __copyright__ = "R-Grosman"
 __license__ = "MIT"
 __version__ = "0.2.0"
 
-async def main(args:argparse.Namespace):
-    """Main async function"""
-    # organism_code = args.organism
+def build_client(args: argparse.Namespace, metrics: RunMetrics | None = None) -> KeggClient:
+    """Builds the KEGG client configured by the command line arguments, recording into ``metrics``"""
+    cache = None
+    if args.cache_dir:
+        cache = ResponseCache(
+            args.cache_dir,
+            ttl=args.cache_ttl * 86400,
+            max_size=int(args.cache_size * 2**20) if args.cache_size else None,
+            offline=args.offline,
+        )
+    return KeggClient(
+        scheduler=Scheduler(args.concurrency, args.rate or None),
+        timeout=args.timeout,
+        retries=args.retries,
+        cache=cache,
+        metrics=metrics,
+    )
+
+
+def entity_output_file(output_file: str, entity_type: str) -> str:
+    """Returns the table name for one entity type, Compounds keep the output file name"""
+    if entity_type == "compound":
+        return output_file
+    root, extension = os.path.splitext(output_file)
+    return f"{root}_{entity_type}{extension}"
+
+
+def organism_output_file(output_file: str, organism: str) -> str:
+    """Returns the table name for one organism of a batch
+
+    Fills in an ``{organism}`` placeholder, or inserts the organism code before the extension.
+    """
+    if "{organism}" in output_file:
+        return output_file.replace("{organism}", organism)
+    root, extension = os.path.splitext(output_file)
+    return f"{root}_{organism}{extension}"
+
+
+async def main(args:argparse.Namespace, client: KeggClient | None = None) -> list[utils.PathwayFailure]:
+    """Main async function, a ``client`` can be passed in to reuse its session
+
+    Returns the pathways, and the organisms, that could not be fetched or
+    parsed, these are missing from the tables.
+
+    Raises:
+      ValueError: no organism was given
+      FetchError: the organism list or the pathway lists of all organisms could not be fetched
+    """
     if args.loglevel:
         logger.setLevel(args.loglevel)
 
-    if not args.outputfile:
-        args.outputfile = f"{args.organism}_{datetime.now():%Y%m%d%H%M%S}.tsv"
-
     if args.organism is None:
-        logger.error(
-            "please provide a three letter kegg organism code e.g 'hsa' for Homo Sapiens"
+        raise ValueError("please provide a three letter kegg organism code e.g 'hsa' for Homo Sapiens")
+    timestamp = f"{datetime.now():%Y%m%d%H%M%S}"
+    metrics = client.metrics if client and client.metrics is not None else RunMetrics()
+
+    async with nullcontext(client) if client else build_client(args, metrics) as client:
+        client.metrics = metrics
+        with metrics.stage("lists"):
+            organisms = args.organism
+            if organisms == ["all"]:
+                organisms = await utils.get_organism_codes(client)
+            pathway_lists = await asyncio.gather(
+                *[utils.get_organism_pathways(organism, client) for organism in organisms], return_exceptions=True
+            )
+            for error in pathway_lists:
+                if isinstance(error, BaseException) and not isinstance(error, FetchError):
+                    raise error
+            if pathway_lists and all(isinstance(paths, FetchError) for paths in pathway_lists):
+                raise pathway_lists[0]
+            organism_paths = {}
+            organism_failures = []
+            pathway_names = {}
+            for organism, paths in zip(organisms, pathway_lists):
+                if isinstance(paths, FetchError):
+                    # one missing organism does not abort the tables of the others
+                    logger.error(f"Skipping {organism}, its pathway list could not be fetched: {paths}")
+                    organism_failures.append(utils.PathwayFailure(organism, str(paths)))
+                    continue
+                organism_paths[organism] = utils.parse_organism_pathways(paths)
+                pathway_names.update(utils.parse_pathway_names(paths))
+            for organism, paths in organism_paths.items():
+                logger.info(f"Path List RECEIVED for {organism}: {len(paths)} Pathways.")
+            paths = list(dict.fromkeys(path for paths in organism_paths.values() for path in paths))
+
+        entity_types = list(
+            dict.fromkeys(
+                [*args.entity_types, *(["equation"] if args.graph else []), *(["compound"] if args.snapshot else [])]
+            )
         )
-    paths = utils.get_organism_pathways(args.organism)
-    paths = utils.parse_organism_pathways(paths)
-    list_len = len(paths)
-
-    logger.info(f"Path List RECEIVED for {args.organism}: {list_len} Pathways.")
-    responses = await tqdm_asyncio.gather(*[utils.send_async_kgml_request(path) for path in paths])
-
-    kgml_roots = [
-        (path_code, ET.fromstring(response)) for path_code, response in responses
-    ]
-    result = [
-        utils.build_path_from_kgml(path_code, kgml_root)
-        for path_code, kgml_root in kgml_roots
-    ]
-
-    result = utils.sort_lists(result)
-    logger.debug(f"{result=}")
-    result = utils.pad_list_items(result)
-    result = utils.transpose_table(result)
-
-    output_str = ["\t".join(line) + "\n" for line in result]
-    with open(args.outputfile, "w") as fh:
-        fh.writelines(output_str)
-    logger.info(f"Table created: {args.outputfile}")
+        manifest = Manifest.load(args.manifest) if args.manifest else Manifest()
+        if not manifest.covers(entity_types):
+            if manifest.pathways:
+                logger.info(f"Manifest lacks some of {', '.join(entity_types)}, refetching all pathways")
+            manifest = Manifest(entity_types=entity_types)
+        release = None
+        if (
+            args.manifest
+            or args.checkpoint
+            or args.graph
+            or args.snapshot
+            or args.output_format in COLUMNAR_FORMATS
+        ):
+            release = await utils.get_kegg_release(client)
+            if release is None and client.cache is not None and client.cache.offline:
+                # offline runs stay on the release the cached responses were recorded under
+                release = manifest.release
+        stale_paths = manifest.stale_pathways(paths, release)
+        if args.manifest:
+            logger.info(
+                f"KEGG release {release}, manifest release {manifest.release}:"
+                f" {len(paths) - len(stale_paths)} pathways reused, fetching {len(stale_paths)}"
+            )
+            if client.cache is not None and release != manifest.release:
+                client.cache.not_before = time.time()
+        journal = None
+        if args.checkpoint:
+            journal = Journal(args.checkpoint, release, manifest.entity_types)
+            resumed = journal.load() if args.resume else {}
+            journal.open(append=bool(resumed))
+            resumed = {path: resumed[path] for path in stale_paths if path in resumed}
+            if args.resume:
+                logger.info(f"Resuming from {args.checkpoint}: {len(resumed)} pathways already completed")
+            manifest.pathways.update(resumed)
+            stale_paths = [path for path in stale_paths if path not in resumed]
+        known_hashes = {
+            path: manifest.pathways[path].content_hash for path in stale_paths if path in manifest.pathways
+        }
+
+        memberships = {entity_type: PathwayMembership() for entity_type in manifest.entity_types}
+        reused_paths = set(paths).difference(stale_paths)
+        for path in paths:
+            if path in reused_paths:
+                for entity_type, membership in memberships.items():
+                    membership.add(path, manifest.pathways[path].members(entity_type))
+
+        annotations = None
+        if args.annotate:
+            with metrics.stage("catalog"):
+                catalog = await load_compound_catalog(client, args.compound_catalog)
+                annotations = {f"compound_{field}": catalog.column(field) for field in args.annotate}
+
+        failures = {}
+        with metrics.stage("pull"):
+            executor = build_executor(args.workers)
+            try:
+                async for pathway in pull_pathways(
+                    stale_paths,
+                    client,
+                    args.pathway_format,
+                    executor=executor,
+                    chunk_size=PROCESS_CHUNK_SIZE if executor else 1,
+                    max_pending=2 * max(args.concurrency, args.workers),
+                    known_hashes=known_hashes,
+                    entity_types=manifest.entity_types,
+                ):
+                    if isinstance(pathway, utils.PathwayFailure):
+                        failures[pathway.pathway_code] = pathway
+                        continue
+                    if pathway.compounds is not None:
+                        metrics.observe_parse(pathway.parse_seconds, pathway.document_size)
+                    if args.manifest:
+                        pathway = manifest.record(pathway)
+                    if journal:
+                        journal.append(pathway)
+                    for entity_type, membership in memberships.items():
+                        membership.add(pathway.pathway_code, pathway.members(entity_type))
+            finally:
+                if executor:
+                    executor.shutdown()
+                if journal:
+                    journal.close()
+
+    with metrics.stage("write"):
+        if args.manifest:
+            manifest.release = release
+            # Failed pathways keep no entry, so the next run fetches them again instead of reusing stale results
+            manifest.pathways = {
+                path: manifest.pathways[path]
+                for path in paths
+                if path in manifest.pathways and path not in failures
+            }
+            manifest.save(args.manifest)
+        if args.snapshot:
+            write_snapshot(
+                memberships["compound"],
+                args.snapshot,
+                metadata={"kegg_release": release, "organisms": list(organism_paths)},
+            )
+
+        extension = OUTPUT_EXTENSIONS[args.output_format]
+        if len(organisms) == 1 or args.combined:
+            label = "combined" if args.combined else organisms[0]
+            output_file = args.outputfile or f"{label}_{timestamp}.{extension}"
+            if "{organism}" in output_file:
+                output_file = organism_output_file(output_file, label)
+            tables = {output_file: paths}
+        else:
+            template = args.outputfile or f"{{organism}}_{timestamp}.{extension}"
+            tables = {
+                organism_output_file(template, organism): organism_paths[organism]
+                for organism in organism_paths
+            }
+
+        reported = {}
+        for output_file, table_paths in tables.items():
+            table_failures = [failures[path] for path in table_paths if path in failures]
+            for entity_type in args.entity_types:
+                membership = memberships[entity_type]
+                entity_file = entity_output_file(output_file, entity_type)
+                write_table(
+                    membership.columns(path for path in table_paths if path in membership),
+                    entity_file,
+                    args.output_format,
+                    pathway_names,
+                    release,
+                    entity_type,
+                    annotations if entity_type == "compound" else None,
+                )
+                if args.matrix:
+                    matrix = build_matrix(membership, sorted(path for path in table_paths if path in membership))
+                    export_matrix(matrix, os.path.splitext(entity_file)[0], args.matrix)
+            if args.graph:
+                graph_file = f"{os.path.splitext(output_file)[0]}.graph"
+                graph_paths = sorted(path for path in table_paths if path in memberships["equation"])
+                build_reaction_graph(memberships["equation"], graph_paths, {"kegg_release": release}).save(graph_file)
+                logger.info(f"Reaction graph created: {graph_file}")
+
+            if table_failures:
+                failed_file = f"{output_file}.failed.tsv"
+                utils.write_failures(table_failures, failed_file)
+                logger.error(
+                    f"{len(table_failures)} of {len(table_paths)} pathways failed and are missing from"
+                    f" {output_file}, see {failed_file}: {', '.join(f.pathway_code for f in table_failures)}"
+                )
+                reported.update((failure.pathway_code, failure) for failure in table_failures)
+
+        if journal and failures:
+            logger.info(f"Checkpoint kept: {args.checkpoint}, rerun with --resume to retry the failed pathways")
+        elif journal:
+            journal.remove()
+
+    pull_seconds = metrics.stages["pull"]["seconds"]
+    metrics.info.update(
+        {
+            "keggpull_version": __version__,
+            "kegg_release": release,
+            "organisms": organisms,
+            "pathways": {
+                "total": len(paths),
+                "fetched": len(stale_paths),
+                "reused": len(paths) - len(stale_paths),
+                "failed": len(failures),
+                "failed_organisms": [failure.pathway_code for failure in organism_failures],
+                "fetched_per_s": len(stale_paths) / pull_seconds if pull_seconds else None,
+            },
+        }
+    )
+    logger.info(
+        f"Pulled {len(stale_paths)} pathways in {pull_seconds:.1f}s: {metrics.requests} requests,"
+        f" {metrics.retries} retries, {metrics.bytes_received / 2**20:.1f} MB,"
+        f" {metrics.parse_seconds:.1f}s parsing {metrics.documents} documents"
+    )
+    if args.report:
+        metrics.write_report(args.report)
+        logger.info(f"Run report created: {args.report}")
+    return [*organism_failures, *reported.values()]
 
 def run():
     """ main entry point for terminal execution"""
+    setup_logging()
+    if sys.argv[1:2] == ["enrich"]:
+        from .enrich import run_enrichment
+
+        run_enrichment(init_enrich_parser().parse_args(sys.argv[2:]))
+        sys.exit(0)
+    if sys.argv[1:2] == ["query"]:
+        from .snapshot import run_query
+
+        query_args = init_query_parser().parse_args(sys.argv[2:])
+        if query_args.loglevel:
+            logger.setLevel(query_args.loglevel)
+        run_query(query_args)
+        sys.exit(0)
+
     parser = init_parser()
     if len(sys.argv) == 1:
         parser.print_help()
         sys.exit(1)
     args = parser.parse_args(sys.argv[1:])
+    if args.organism is None:
+        parser.error("please provide a three letter kegg organism code e.g 'hsa' for Homo Sapiens")
+    if args.concurrency < 1:
+        parser.error(f"--concurrency must be at least 1, got {args.concurrency}")
+    if args.rate < 0:
+        parser.error(f"--rate must not be negative, got {args.rate:g}")
+    if args.retries < 0:
+        parser.error(f"--retries must not be negative, got {args.retries}")
+    if args.offline and not args.cache_dir:
+        parser.error("--offline requires --cache-dir")
+    if args.resume and not args.checkpoint:
+        parser.error("--resume requires --checkpoint")
+    if args.annotate and (args.output_format == "wide" or "compound" not in args.entity_types):
+        parser.error("--annotate joins into the compound table, it requires a long or columnar --format")
+    if args.pathway_format == "text" and (args.graph or not set(args.entity_types).issubset(utils.TEXT_ENTITY_TYPES)):
+        parser.error(f"--pathway-format text only lists {', '.join(utils.TEXT_ENTITY_TYPES)}, not reaction graphs")
     logger.debug(f"{args=}")
-    asyncio.run(main(args))
-    sys.exit(0)
+    try:
+        if args.profile:
+            import cProfile
+
+            profiler = cProfile.Profile()
+            failures = profiler.runcall(asyncio.run, main(args))
+            profiler.dump_stats(args.profile)
+            logger.info(f"Profile created: {args.profile}")
+        else:
+            failures = asyncio.run(main(args))
+    except FetchError as error:
+        logger.error(f"Request failed: {error}")
+        sys.exit(1)
+    sys.exit(1 if failures else 0)
 
 
 # Initiate Script
@@ -72,4 +359,5 @@ if __name__ == "__main__":
         parser.print_help()
         sys.exit(1)
     args = parser.parse_args(input_args[1:])
+    setup_logging()
     asyncio.run(main(args))
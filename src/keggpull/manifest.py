@@ -0,0 +1,87 @@
+import json
+import os
+import time
+from collections.abc import Iterable
+from dataclasses import asdict, dataclass, field
+
+from .utilities import ExtractedPathway, atomic_write
+
+__author__ = "R-Grosman"
+__copyright__ = "R-Grosman"
+__license__ = "MIT"
+__version__ = "0.2.0"
+
+
+@dataclass
+class ManifestEntry:
+    """The recorded result of one pathway"""
+
+    pathway_code: str
+    content_hash: str
+    fetched: float
+    compounds: list[str]
+    entities: dict[str, list[str]] = field(default_factory=dict)
+
+    def members(self, entity_type: str = "compound") -> list[str]:
+        """Returns the recorded IDs of one entity type"""
+        if entity_type == "compound":
+            return self.compounds
+        return self.entities.get(entity_type, [])
+
+
+@dataclass
+class Manifest:
+    """Results of a previous run keyed by path code, with the KEGG release they were pulled from
+
+    ``entity_types`` are the entity types recorded for every pathway.
+    """
+
+    release: str | None = None
+    pathways: dict[str, ManifestEntry] = field(default_factory=dict)
+    entity_types: list[str] = field(default_factory=lambda: ["compound"])
+
+    @classmethod
+    def load(cls, path: str | os.PathLike) -> "Manifest":
+        """Reads a manifest from a JSON file, an empty manifest if the file does not exist"""
+        try:
+            with open(path, "r") as fh:
+                data = json.load(fh)
+        except FileNotFoundError:
+            return cls()
+        pathways = {entry["pathway_code"]: ManifestEntry(**entry) for entry in data["pathways"]}
+        return cls(data["release"], pathways, data.get("entity_types", ["compound"]))
+
+    def save(self, path: str | os.PathLike) -> None:
+        """Writes the manifest to a JSON file"""
+        data = {
+            "release": self.release,
+            "pathways": [asdict(entry) for entry in self.pathways.values()],
+            "entity_types": self.entity_types,
+        }
+        with atomic_write(path) as fh:
+            json.dump(data, fh)
+
+    def covers(self, entity_types: Iterable[str]) -> bool:
+        """Checks whether the recorded results include all of ``entity_types``"""
+        return set(entity_types).issubset(self.entity_types)
+
+    def stale_pathways(self, pathway_codes: list[str], release: str | None) -> list[str]:
+        """Returns the pathways that have to be fetched again for ``release``
+
+        New pathways are always stale. Recorded ones only go stale when the
+        release changed or could not be determined.
+        """
+        if release is None or release != self.release:
+            return list(pathway_codes)
+        return [path_code for path_code in pathway_codes if path_code not in self.pathways]
+
+    def record(self, pathway: ExtractedPathway) -> ManifestEntry:
+        """Records a fetched pathway, reusing the recorded results if it was unchanged"""
+        if pathway.compounds is None:
+            recorded = self.pathways[pathway.pathway_code]
+            compounds, entities = recorded.compounds, recorded.entities
+        else:
+            compounds, entities = pathway.compounds, pathway.entities
+        entry = ManifestEntry(pathway.pathway_code, pathway.content_hash, time.time(), compounds, entities)
+        self.pathways[pathway.pathway_code] = entry
+        return entry
@@ -0,0 +1,157 @@
+import json
+import os
+import sys
+import time
+from bisect import bisect_left
+from collections.abc import Iterator
+from contextlib import contextmanager
+
+try:
+    import resource
+except ImportError:  # pragma: no cover
+    resource = None
+
+__author__ = "R-Grosman"
+__copyright__ = "R-Grosman"
+__license__ = "MIT"
+__version__ = "0.2.0"
+
+
+# Upper bounds in milliseconds of the histogram buckets, the last bucket holds everything slower
+LATENCY_BUCKETS_MS = (5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000, 30000)
+
+
+def peak_rss_mb() -> float | None:
+    """Returns the peak resident set size of this process in MB, None where it cannot be read"""
+    if resource is None:  # pragma: no cover
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / 2**20 if sys.platform == "darwin" else peak / 2**10
+
+
+class Histogram:
+    """Counts durations in the ``LATENCY_BUCKETS_MS`` buckets and keeps their total and maximum"""
+
+    def __init__(self):
+        self.counts = [0] * (len(LATENCY_BUCKETS_MS) + 1)
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def observe(self, seconds: float) -> None:
+        milliseconds = seconds * 1000
+        self.counts[bisect_left(LATENCY_BUCKETS_MS, milliseconds)] += 1
+        self.count += 1
+        self.total += milliseconds
+        self.max = max(self.max, milliseconds)
+
+    def quantile(self, fraction: float) -> float | None:
+        """Returns the upper bound of the bucket holding the ``fraction`` quantile, in milliseconds"""
+        if not self.count:
+            return None
+        seen = 0
+        for bound, count in zip(LATENCY_BUCKETS_MS, self.counts):
+            seen += count
+            if seen >= fraction * self.count:
+                return float(bound)
+        return self.max
+
+    def as_dict(self) -> dict:
+        return {
+            "count": self.count,
+            "mean_ms": self.total / self.count if self.count else None,
+            "p50_ms": self.quantile(0.5),
+            "p95_ms": self.quantile(0.95),
+            "max_ms": self.max,
+            "buckets_ms": {
+                **{f"<={bound}": count for bound, count in zip(LATENCY_BUCKETS_MS, self.counts)},
+                f">{LATENCY_BUCKETS_MS[-1]}": self.counts[-1],
+            },
+        }
+
+
+class RunMetrics:
+    """Counters, histograms and stage timings of one run
+
+    The client records every request round trip, retry and cache lookup, the
+    pipeline every parsed document, and ``stage`` times blocks of the run. The
+    peak RSS of a stage is the process peak when the stage ended.
+    """
+
+    def __init__(self):
+        self.started = time.time()
+        self.requests = 0
+        self.request_errors = 0
+        self.bytes_received = 0
+        self.retries = 0
+        self.cache_hits = 0
+        self.cache_misses = 0
+        self.cache_revalidated = 0
+        self.latency = Histogram()
+        self.documents = 0
+        self.document_bytes = 0
+        self.parse_seconds = 0.0
+        self.parse_time = Histogram()
+        self.stages: dict[str, dict] = {}
+        self.info: dict = {}
+
+    def observe_request(self, seconds: float, size: int | None) -> None:
+        """Records one request round trip, ``size`` is None when it failed without a response"""
+        self.requests += 1
+        self.latency.observe(seconds)
+        if size is None:
+            self.request_errors += 1
+        else:
+            self.bytes_received += size
+
+    def observe_parse(self, seconds: float, size: int) -> None:
+        """Records the parse of one document of ``size`` bytes"""
+        self.documents += 1
+        self.document_bytes += size
+        self.parse_seconds += seconds
+        self.parse_time.observe(seconds)
+
+    @contextmanager
+    def stage(self, name: str) -> Iterator[None]:
+        """Times the wrapped block as stage ``name``"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.stages[name] = {"seconds": time.perf_counter() - start, "peak_rss_mb": peak_rss_mb()}
+
+    def report(self) -> dict:
+        """Returns the run report as JSON serialisable dict"""
+        lookups = self.cache_hits + self.cache_misses
+        return {
+            **self.info,
+            "started": self.started,
+            "seconds": time.time() - self.started,
+            "peak_rss_mb": peak_rss_mb(),
+            "requests": {
+                "count": self.requests,
+                "errors": self.request_errors,
+                "retries": self.retries,
+                "bytes_received": self.bytes_received,
+                "latency": self.latency.as_dict(),
+            },
+            "cache": {
+                "hits": self.cache_hits,
+                "misses": self.cache_misses,
+                "revalidated": self.cache_revalidated,
+                "hit_rate": self.cache_hits / lookups if lookups else None,
+            },
+            "parse": {
+                "documents": self.documents,
+                "bytes": self.document_bytes,
+                "seconds": self.parse_seconds,
+                "mb_per_s": self.document_bytes / 2**20 / self.parse_seconds if self.parse_seconds else None,
+                "per_document": self.parse_time.as_dict(),
+            },
+            "stages": self.stages,
+        }
+
+    def write_report(self, output_file: str | os.PathLike) -> None:
+        """Writes the run report as a JSON file"""
+        with open(output_file, "w") as fh:
+            json.dump(self.report(), fh, indent=2)
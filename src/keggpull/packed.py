@@ -0,0 +1,124 @@
+import json
+import mmap
+import os
+import sys
+from array import array
+from collections.abc import Iterable
+
+from .utilities import atomic_write
+
+__author__ = "R-Grosman"
+__copyright__ = "R-Grosman"
+__license__ = "MIT"
+__version__ = "0.2.0"
+
+
+MAGIC = b"KEGGPULL"
+PACKED_VERSION = 1
+# Every array starts on a multiple of this many bytes so it can be cast in place
+ALIGNMENT = 8
+
+
+def _padding(size: int) -> int:
+    return -size % ALIGNMENT
+
+
+def csr(rows: Iterable[Iterable[int]]) -> tuple[array, array]:
+    """Packs rows of indices into an ``array('Q')`` of offsets and an ``array('I')`` of indices"""
+    offsets = array("Q", [0])
+    indices = array("I")
+    for row in rows:
+        indices.extend(row)
+        offsets.append(len(indices))
+    return offsets, indices
+
+
+def write_packed(path: str | os.PathLike, kind: str, arrays: dict[str, array], **header) -> None:
+    """Writes typed arrays and a JSON header to one memory-mappable file
+
+    The file holds ``MAGIC``, the header length as 8 little-endian bytes, the
+    JSON header and then the raw arrays, each aligned to ``ALIGNMENT`` bytes
+    in native byte order. ``kind`` names the layout for readers, the keyword
+    arguments (labels, metadata) are stored in the header as given.
+    """
+    layout = {}
+    offset = 0
+    for name, values in arrays.items():
+        layout[name] = {"typecode": values.typecode, "offset": offset, "length": len(values)}
+        offset += len(values) * values.itemsize + _padding(len(values) * values.itemsize)
+    header = {
+        "kind": kind,
+        "version": PACKED_VERSION,
+        "byteorder": sys.byteorder,
+        "arrays": layout,
+        **header,
+    }
+    header_bytes = json.dumps(header).encode("utf-8")
+    header_bytes += b" " * _padding(len(MAGIC) + 8 + len(header_bytes))
+
+    with atomic_write(path, "wb") as fh:
+        fh.write(MAGIC)
+        fh.write(len(header_bytes).to_bytes(8, "little"))
+        fh.write(header_bytes)
+        for values in arrays.values():
+            fh.write(values.tobytes())
+            fh.write(b"\0" * _padding(len(values) * values.itemsize))
+
+
+class PackedFile:
+    """A file written by ``write_packed`` opened with mmap
+
+    ``arrays`` are zero-copy memoryviews cast to their typecodes, they stay
+    valid until the file is closed.
+
+    Raises:
+      ValueError: the file is not a packed file of ``kind`` or was written with another byte order
+    """
+
+    def __init__(self, path: str | os.PathLike, kind: str | None = None):
+        self.path = path
+        with open(path, "rb") as fh:
+            self._mmap = mmap.mmap(fh.fileno(), 0, access=mmap.ACCESS_READ)
+        self._view = memoryview(self._mmap)
+        try:
+            self.header = self._read_header(kind)
+        except ValueError:
+            self.close()
+            raise
+        start = len(MAGIC) + 8 + self._header_size
+        self.arrays = {}
+        for name, layout in self.header["arrays"].items():
+            offset = start + layout["offset"]
+            size = layout["length"] * array(layout["typecode"]).itemsize
+            self.arrays[name] = self._view[offset : offset + size].cast(layout["typecode"])
+
+    def _read_header(self, kind: str | None) -> dict:
+        if self._view[: len(MAGIC)] != MAGIC:
+            raise ValueError(f"{self.path} is not a KEGGpull packed file")
+        self._header_size = int.from_bytes(self._view[len(MAGIC) : len(MAGIC) + 8], "little")
+        header = json.loads(bytes(self._view[len(MAGIC) + 8 : len(MAGIC) + 8 + self._header_size]))
+        if kind is not None and header["kind"] != kind:
+            raise ValueError(f"{self.path} holds a {header['kind']}, expected a {kind}")
+        if header["version"] != PACKED_VERSION:
+            raise ValueError(f"{self.path} has packed format version {header['version']}, expected {PACKED_VERSION}")
+        if header["byteorder"] != sys.byteorder:
+            raise ValueError(f"{self.path} was written on a {header['byteorder']}-endian machine")
+        return header
+
+    def __enter__(self) -> "PackedFile":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def close(self) -> None:
+        """Releases the array views and unmaps the file"""
+        for view in getattr(self, "arrays", {}).values():
+            view.release()
+        self.arrays = {}
+        self._view.release()
+        try:
+            self._mmap.close()
+        except BufferError:
+            # slices of the arrays are still referenced, the map is unmapped once they are collected
+            pass
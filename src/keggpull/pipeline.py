@@ -0,0 +1,147 @@
+import asyncio
+import itertools
+import multiprocessing
+import time
+import xml.etree.ElementTree as ET
+from collections.abc import AsyncIterator, Sequence
+from concurrent.futures import Executor, ProcessPoolExecutor
+
+from . import utilities as utils
+from .client import KeggClient
+from .utilities import ExtractedPathway, PathwayFailure
+
+__author__ = "R-Grosman"
+__copyright__ = "R-Grosman"
+__license__ = "MIT"
+__version__ = "0.2.0"
+
+
+# Requests (batches in batch formats) parsed per process pool task, to amortise the pickling round trip
+PROCESS_CHUNK_SIZE = 8
+
+
+def build_executor(workers: int) -> Executor | None:
+    """Returns a process pool with ``workers`` processes, or None to parse in the loop's thread pool"""
+    if workers < 1:
+        return None
+    return ProcessPoolExecutor(workers, mp_context=multiprocessing.get_context("spawn"))
+
+
+def parse_document(
+    path_code: str,
+    document: str,
+    pathway_format: str = "kgml",
+    known_hash: str | None = None,
+    entity_types: Sequence[str] = ("compound",),
+) -> ExtractedPathway | PathwayFailure:
+    """Extracts the Compounds of one pathway document, returning a ``PathwayFailure`` if it is malformed
+
+    Other ``entity_types`` are extracted in the same pass. A document whose hash
+    equals ``known_hash`` is unchanged and not parsed again.
+    """
+    start = time.perf_counter()
+    document_hash = utils.content_hash(document)
+    if document_hash == known_hash:
+        return ExtractedPathway(path_code, None, document_hash)
+    try:
+        if tuple(entity_types) == ("compound",):
+            compounds, entities = utils.extract_compounds(path_code, document, pathway_format)[1:], {}
+        else:
+            entities = utils.extract_entities(path_code, document, pathway_format, entity_types)
+            compounds = entities.pop("compound", [])
+    except ET.ParseError as error:
+        return PathwayFailure(path_code, f"invalid KGML: {error}")
+    return ExtractedPathway(
+        path_code, compounds, document_hash, entities, time.perf_counter() - start, len(document)
+    )
+
+
+def parse_documents(
+    responses: list[tuple[str, str] | PathwayFailure],
+    pathway_format: str = "kgml",
+    known_hashes: dict[str, str] | None = None,
+    entity_types: Sequence[str] = ("compound",),
+) -> list[ExtractedPathway | PathwayFailure]:
+    """Parses a list of fetched pathway documents, passing failures through"""
+    known_hashes = known_hashes or {}
+    return [
+        response
+        if isinstance(response, PathwayFailure)
+        else parse_document(*response, pathway_format, known_hashes.get(response[0]), entity_types)
+        for response in responses
+    ]
+
+
+async def pull_pathways(
+    pathway_codes: list[str],
+    client: KeggClient,
+    pathway_format: str = "kgml",
+    executor: Executor | None = None,
+    chunk_size: int = 1,
+    max_pending: int | None = None,
+    known_hashes: dict[str, str] | None = None,
+    progress: bool = True,
+    entity_types: Sequence[str] = ("compound",),
+) -> AsyncIterator[ExtractedPathway | PathwayFailure]:
+    """Fetches pathways and yields their Compounds, and any other ``entity_types``, as each one is parsed
+
+    The responses of every ``chunk_size`` requests (batches in batch formats) are
+    handed to ``executor`` (the loop's default thread pool when None) as one task
+    as soon as they arrive, so parsing overlaps the remaining downloads and never
+    blocks the event loop. Only the extracted lists are kept: at most
+    ``max_pending`` tasks exist at a time, each one fetched or waiting to be
+    parsed, and a finished task is replaced by the next chunk. This bounds both
+    the raw documents and the tasks held in memory. Documents matching their entry in
+    ``known_hashes`` (path code to content hash) are yielded without Compounds.
+    """
+    from tqdm import tqdm
+
+    loop = asyncio.get_running_loop()
+    batch_size = utils.MAX_BATCH_SIZE if pathway_format in utils.BATCH_FORMATS else 1
+    max_pending = max_pending or 2 * client.scheduler.max_in_flight
+    step = batch_size * chunk_size
+    chunks = (
+        [
+            pathway_codes[start : start + batch_size]
+            for start in range(offset, min(offset + step, len(pathway_codes)), batch_size)
+        ]
+        for offset in range(0, len(pathway_codes), step)
+    )
+
+    async def fetch(batch: list[str]) -> list[tuple[str, str] | PathwayFailure]:
+        if batch_size == 1:
+            return [await utils.fetch_pathway_kgml(batch[0], client)]
+        return await utils.fetch_pathway_batch(batch, client)
+
+    async def fetch_and_parse(chunk: list[list[str]]) -> list[ExtractedPathway | PathwayFailure]:
+        batches = await asyncio.gather(*[fetch(batch) for batch in chunk])
+        responses = [response for batch in batches for response in batch]
+        chunk_hashes = {
+            path_code: known_hashes[path_code]
+            for batch in chunk
+            for path_code in batch
+            if known_hashes and path_code in known_hashes
+        }
+        return await loop.run_in_executor(
+            executor, parse_documents, responses, pathway_format, chunk_hashes, entity_types
+        )
+
+    def submit(count: int) -> set[asyncio.Future]:
+        return {asyncio.ensure_future(fetch_and_parse(chunk)) for chunk in itertools.islice(chunks, count)}
+
+    tasks = set()
+    try:
+        with tqdm(total=len(pathway_codes), disable=not progress) as progress_bar:
+            tasks = submit(max_pending)
+            while tasks:
+                done, tasks = await asyncio.wait(tasks, return_when=asyncio.FIRST_COMPLETED)
+                # the freed slots are refilled before the results are handed to the consumer
+                tasks |= submit(len(done))
+                for task in done:
+                    results = task.result()
+                    progress_bar.update(len(results))
+                    for result in results:
+                        yield result
+    finally:
+        for task in tasks:
+            task.cancel()
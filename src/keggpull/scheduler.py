@@ -0,0 +1,71 @@
+import asyncio
+import time
+
+__author__ = "R-Grosman"
+__copyright__ = "R-Grosman"
+__license__ = "MIT"
+__version__ = "0.2.0"
+
+
+# KEGG asks API users to stay at or below 3 requests per second
+DEFAULT_RATE = 3.0
+DEFAULT_MAX_IN_FLIGHT = 3
+
+
+class TokenBucket:
+    """Token bucket pacing acquisitions to ``rate`` per second with bursts of up to ``capacity``"""
+
+    def __init__(self, rate: float, capacity: float | None = None):
+        if rate <= 0:
+            raise ValueError(f"rate must be positive, got {rate}")
+        self.rate = rate
+        self.capacity = capacity if capacity is not None else max(1.0, rate)
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    async def acquire(self) -> None:
+        """Waits until a token is available and takes it"""
+        async with self._lock:
+            self._refill()
+            while self._tokens < 1:
+                await asyncio.sleep((1 - self._tokens) / self.rate)
+                self._refill()
+            self._tokens -= 1
+
+
+class Scheduler:
+    """Caps the number of in-flight requests and paces request starts with a token bucket
+
+    Used as an async context manager around each request, a ``rate`` of ``None``
+    disables the rate limit and only bounds concurrency.
+    """
+
+    def __init__(
+        self,
+        max_in_flight: int = DEFAULT_MAX_IN_FLIGHT,
+        rate: float | None = DEFAULT_RATE,
+    ):
+        if max_in_flight < 1:
+            raise ValueError(f"max_in_flight must be at least 1, got {max_in_flight}")
+        self.max_in_flight = max_in_flight
+        self.bucket = TokenBucket(rate) if rate else None
+        self._semaphore = asyncio.Semaphore(max_in_flight)
+
+    async def __aenter__(self) -> "Scheduler":
+        await self._semaphore.acquire()
+        if self.bucket is not None:
+            try:
+                await self.bucket.acquire()
+            except BaseException:
+                self._semaphore.release()
+                raise
+        return self
+
+    async def __aexit__(self, *exc_info) -> None:
+        self._semaphore.release()
@@ -0,0 +1,205 @@
+import argparse
+import bisect
+import os
+import re
+import sys
+import time
+from array import array
+from collections.abc import Iterable
+
+from .compounds import PathwayMembership
+from .logger import logger
+from .packed import PackedFile, csr, write_packed
+
+__author__ = "R-Grosman"
+__copyright__ = "R-Grosman"
+__license__ = "MIT"
+__version__ = "0.2.0"
+
+
+SNAPSHOT_KIND = "snapshot"
+ORGANISM_RE = re.compile("[a-z]+")
+# Posting lists this many times longer than the current matches are searched instead of scanned
+SEARCH_RATIO = 16
+
+
+def write_snapshot(
+    membership: PathwayMembership,
+    output_file: str | os.PathLike,
+    pathway_codes: Iterable[str] | None = None,
+    metadata: dict | None = None,
+) -> None:
+    """Writes the Compounds of the given pathways, by default all, as a snapshot that ``Snapshot`` maps
+
+    Pathways and Compounds are sorted, each pathway lists its distinct Compound
+    indices and each Compound its pathway indices, both in ascending order. The
+    organism of every pathway is recorded from its path code prefix, so the
+    Compound postings double as a reverse index across organisms.
+    """
+    pathways = sorted(membership.pathways if pathway_codes is None else pathway_codes)
+    pathway_organisms = [ORGANISM_RE.match(pathway_code).group() for pathway_code in pathways]
+    organisms = sorted(set(pathway_organisms))
+    organism_index = {organism: index for index, organism in enumerate(organisms)}
+    pathway_ids = [membership.compound_set(pathway_code) for pathway_code in pathways]
+    used_ids = sorted(set().union(*pathway_ids), key=membership.dictionary.compounds.__getitem__)
+    compounds = list(membership.dictionary.decode(used_ids))
+    column_of = {compound_id: column for column, compound_id in enumerate(used_ids)}
+
+    rows = [sorted(column_of[compound_id] for compound_id in compound_ids) for compound_ids in pathway_ids]
+    postings = [[] for _ in compounds]
+    for pathway_index, row in enumerate(rows):
+        for column in row:
+            postings[column].append(pathway_index)
+
+    arrays = {}
+    arrays["pathway_offsets"], arrays["pathway_compounds"] = csr(rows)
+    arrays["compound_offsets"], arrays["compound_pathways"] = csr(postings)
+    arrays["pathway_organisms"] = array("I", [organism_index[organism] for organism in pathway_organisms])
+    write_packed(
+        output_file,
+        SNAPSHOT_KIND,
+        arrays,
+        compounds=compounds,
+        pathways=pathways,
+        organisms=organisms,
+        metadata=metadata or {},
+    )
+    logger.info(f"Snapshot created: {output_file} ({len(pathways)} pathways, {len(compounds)} compounds)")
+
+
+class Snapshot:
+    """Read-only pathway and Compound lookups on a memory-mapped snapshot
+
+    Labels are found by binary search in the sorted label lists, so opening a
+    snapshot builds no index, and the ID lookups return zero-copy slices of
+    the mapped arrays. Close the snapshot, or use it as a context manager, once
+    the slices are no longer needed.
+
+    Raises:
+      ValueError: the file is not a snapshot
+    """
+
+    def __init__(self, path: str | os.PathLike):
+        self._file = PackedFile(path, SNAPSHOT_KIND)
+        self.compounds: list[str] = self._file.header["compounds"]
+        self.pathways: list[str] = self._file.header["pathways"]
+        self.organisms: list[str] = self._file.header["organisms"]
+        self.metadata: dict = self._file.header["metadata"]
+        self.arrays = self._file.arrays
+
+    def __enter__(self) -> "Snapshot":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def close(self) -> None:
+        """Unmaps the snapshot"""
+        self._file.close()
+
+    def __len__(self) -> int:
+        return len(self.pathways)
+
+    def __contains__(self, pathway_code: str) -> bool:
+        return _find(self.pathways, pathway_code) is not None
+
+    def pathway_index(self, pathway_code: str) -> int:
+        """Returns the index of a pathway
+
+        Raises:
+          KeyError: the pathway is not in the snapshot
+        """
+        index = _find(self.pathways, pathway_code)
+        if index is None:
+            raise KeyError(pathway_code)
+        return index
+
+    def compound_index(self, compound: str) -> int | None:
+        """Returns the index of a Compound, None if no pathway contains it"""
+        return _find(self.compounds, compound)
+
+    def compound_ids(self, pathway_code: str) -> memoryview:
+        """Returns a zero-copy view of the sorted Compound indices of a pathway
+
+        Raises:
+          KeyError: the pathway is not in the snapshot
+        """
+        index = self.pathway_index(pathway_code)
+        offsets = self.arrays["pathway_offsets"]
+        return self.arrays["pathway_compounds"][offsets[index] : offsets[index + 1]]
+
+    def pathway_ids(self, compound: str) -> memoryview:
+        """Returns a zero-copy view of the sorted indices of the pathways that contain a Compound"""
+        index = self.compound_index(compound)
+        if index is None:
+            return self.arrays["compound_pathways"][0:0]
+        offsets = self.arrays["compound_offsets"]
+        return self.arrays["compound_pathways"][offsets[index] : offsets[index + 1]]
+
+    def compounds_of(self, pathway_code: str) -> list[str]:
+        """Returns the Compounds of a pathway sorted by Compound ID
+
+        Raises:
+          KeyError: the pathway is not in the snapshot
+        """
+        return [self.compounds[index] for index in self.compound_ids(pathway_code)]
+
+    def pathways_of(self, compound: str) -> list[str]:
+        """Returns the pathways that contain a Compound sorted by path code"""
+        return [self.pathways[index] for index in self.pathway_ids(compound)]
+
+    def postings(self, compound: str) -> list[tuple[str, str]]:
+        """Returns the (organism, path code) pairs of the pathways that contain a Compound"""
+        return [self._posting(index) for index in self.pathway_ids(compound)]
+
+    def query(self, compounds: Iterable[str], organisms: Iterable[str] | None = None) -> list[tuple[str, str]]:
+        """Returns the (organism, path code) pairs of the pathways that contain all ``compounds``
+
+        Posting lists are intersected from the shortest up, by binary search in
+        lists over ``SEARCH_RATIO`` times longer than the matches so far and by
+        a set intersection otherwise, optionally keeping only pathways of
+        ``organisms``.
+        """
+        postings = sorted((self.pathway_ids(compound) for compound in compounds), key=len)
+        if not postings:
+            return []
+        matches = list(postings[0])
+        for posting in postings[1:]:
+            if not matches:
+                break
+            if len(posting) > SEARCH_RATIO * len(matches):
+                matches = [index for index in matches if _contains(posting, index)]
+            else:
+                matches = sorted(set(matches).intersection(posting))
+        if organisms is not None:
+            wanted = {_find(self.organisms, organism) for organism in organisms}
+            pathway_organisms = self.arrays["pathway_organisms"]
+            matches = [index for index in matches if pathway_organisms[index] in wanted]
+        return [self._posting(index) for index in matches]
+
+    def _posting(self, pathway_index: int) -> tuple[str, str]:
+        return self.organisms[self.arrays["pathway_organisms"][pathway_index]], self.pathways[pathway_index]
+
+
+def _contains(posting: memoryview, index: int) -> bool:
+    position = bisect.bisect_left(posting, index)
+    return position < len(posting) and posting[position] == index
+
+
+def _find(labels: list[str], label: str) -> int | None:
+    index = bisect.bisect_left(labels, label)
+    if index < len(labels) and labels[index] == label:
+        return index
+    return None
+
+
+def run_query(args: argparse.Namespace) -> None:
+    """Runs the ``keggpull query`` subcommand"""
+    with Snapshot(args.snapshot) as snapshot:
+        start = time.perf_counter()
+        matches = snapshot.query(args.compounds, args.organism)
+        logger.info(
+            f"{len(matches)} pathways contain {', '.join(args.compounds)}"
+            f" ({(time.perf_counter() - start) * 1000:.3f} ms)"
+        )
+    sys.stdout.writelines(f"{organism}\t{pathway_code}\n" for organism, pathway_code in matches)
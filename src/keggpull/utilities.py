@@ -1,8 +1,13 @@
-import asyncio
+import hashlib
+import os
 import re
-import sys
 import xml.etree.ElementTree as ET
-import requests
+from collections.abc import Iterable, Iterator
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from typing import IO
+from . import kgml
+from .client import KEGG_REST_URL, FetchError, KeggClient, KeggResponse
 from .logger import logger
 
 __author__ = "R-Grosman"
@@ -12,37 +17,97 @@ __version__ = "0.2.0"
 
 
 
-def pathway_list_url(user_input: str) -> str:
+# KEGG's get endpoint accepts up to 10 "+"-joined entries, but only for flat files
+MAX_BATCH_SIZE = 10
+PATHWAY_FORMATS = ("kgml", "text")
+BATCH_FORMATS = frozenset({"text"})
+# Reference pathways shared by all organisms, KEGG lists both under the map codes
+REFERENCE_ORGANISMS = ("map", "ko")
+# Entity types listed in pathway flat files, reactions and relations are only in KGML
+TEXT_ENTITY_TYPES = ("compound", "gene", "ortholog", "map")
+
+
+def pathway_list_url(user_input: str, base_url: str = KEGG_REST_URL) -> str:
     """Returns the URL for the generating list of pathways"""
-    return f"https://rest.kegg.jp/list/pathway/{user_input}"
+    if user_input in REFERENCE_ORGANISMS:
+        return f"{base_url}/list/pathway"
+    return f"{base_url}/list/pathway/{user_input}"
+
+
+def organism_list_url(base_url: str = KEGG_REST_URL) -> str:
+    """Returns the URL for the list of KEGG organisms"""
+    return f"{base_url}/list/organism"
+
+
+def release_info_url(database: str = "pathway", base_url: str = KEGG_REST_URL) -> str:
+    """Returns the URL for the release information of a KEGG database"""
+    return f"{base_url}/info/{database}"
 
 
-def pathway_kgml_url(user_input: str) -> str:
+def pathway_kgml_url(user_input: str, base_url: str = KEGG_REST_URL) -> str:
     """Returns the URL for pathway information in kgml format"""
-    return f"https://rest.kegg.jp/get/{user_input}/kgml"
+    return f"{base_url}/get/{user_input}/kgml"
 
 
-def pathway_text_url(user_input: str) -> str:
+def pathway_text_url(user_input: str, base_url: str = KEGG_REST_URL) -> str:
     """Returns the URL for pathway information in plain text"""
-    return f"https://rest.kegg.jp/get/{user_input}"
+    return f"{base_url}/get/{user_input}"
 
 
-def get_organism_pathways(organism_code: str) -> str:
-    """Queries KEGG and returns a str of pathways"""
-    get_url = pathway_list_url(organism_code)
+async def get_organism_pathways(organism_code: str, client: KeggClient) -> str:
+    """Queries KEGG and returns a str of pathways
+
+    Raises:
+      FetchError: the pathway list could not be fetched
+    """
+    get_url = pathway_list_url(organism_code, client.base_url)
     logger.info(f"Querying {organism_code} with {get_url}")
-    response = requests.get(get_url)
+    response = await client.get(get_url)
     if response.status_code != 200:
-        logger.error(f"Request failed with status code {response.status_code}")
-        sys.exit()
+        raise FetchError(get_url, f"status code {response.status_code}")
 
+    if organism_code == "ko":
+        return re.sub("^(path:)?map", r"\1ko", response.text, flags=re.MULTILINE)
     return response.text
 
 
-def rest_response_validator(api_response: requests.Response) -> bool:
+async def get_organism_codes(client: KeggClient) -> list[str]:
+    """Queries KEGG and returns the codes of all organisms
+
+    Raises:
+      FetchError: the organism list could not be fetched
+    """
+    get_url = organism_list_url(client.base_url)
+    logger.info(f"Querying the organism list with {get_url}")
+    response = await client.get(get_url)
+    if response.status_code != 200:
+        raise FetchError(get_url, f"status code {response.status_code}")
+
+    return [line.split("\t")[1] for line in response.text.split("\n") if line]
+
+
+async def get_kegg_release(client: KeggClient, database: str = "pathway") -> str | None:
+    """Queries KEGG for the current release of a database, bypassing the response cache
+
+    Returns None when the release could not be determined.
+    """
+    get_url = release_info_url(database, client.base_url)
+    try:
+        response = await client.get(get_url, use_cache=False)
+    except FetchError as error:
+        logger.warning(f"Could not query the KEGG release: {error}")
+        return None
+    match = re.search(r"Release\s+([^,\s]+)", response.text) if response.status_code == 200 else None
+    if match is None:
+        logger.warning(f"No KEGG release found in the response to {get_url}")
+        return None
+    return match.group(1)
+
+
+def rest_response_validator(api_response: KeggResponse) -> bool:
     """Checks the REST query response and returns a bool"""
     if api_response.status_code == 200:
-        logger.info(f"Query: {api_response.url} is valid")
+        logger.debug(f"Query: {api_response.url} is valid")
         return True
     if api_response.status_code in [400, 404]:
         logger.info(f"Query: {api_response.url} is invalid")
@@ -61,17 +126,224 @@ def parse_organism_pathways(kegg_organism_pathways: str) -> list[str]:
     return paths
 
 
-def get_pathway_kgml(pathway_code: str) -> tuple[str, str]:
-    """Queries KEGG for a pathway and returns a tuple of path code and the pathway in KGML format"""
-    url = pathway_kgml_url(pathway_code)
-    response = requests.get(url)
+def parse_pathway_names(kegg_organism_pathways: str) -> dict[str, str]:
+    """Parses the string return from KEGG into a dict of pathway names keyed by path code"""
+    names = {}
+    for path in kegg_organism_pathways.split("\n"):
+        if "\t" in path:
+            path_code, name = path.split("\t")[:2]
+            names[path_code.removeprefix("path:")] = name
+    return names
+
+
+@dataclass
+class PathwayFailure:
+    """Records a pathway that could not be fetched or parsed"""
+
+    pathway_code: str
+    reason: str
+
+
+@dataclass
+class ExtractedPathway:
+    """The Compounds extracted from one pathway document and the hash of that document
+
+    ``compounds`` is None when the document matched a known hash and was not
+    parsed again. Other extracted entity types are in ``entities``, the size
+    of the document and the time it took to parse it are kept for run reports.
+    """
+
+    pathway_code: str
+    compounds: list[str] | None
+    content_hash: str
+    entities: dict[str, list[str]] = field(default_factory=dict)
+    parse_seconds: float = field(default=0.0, compare=False)
+    document_size: int = field(default=0, compare=False)
+
+    def members(self, entity_type: str = "compound") -> list[str]:
+        """Returns the extracted IDs of one entity type"""
+        if entity_type == "compound":
+            return self.compounds
+        return self.entities.get(entity_type, [])
+
+
+def content_hash(document: str) -> str:
+    """Returns the SHA-256 hex digest of a pathway document"""
+    return hashlib.sha256(document.encode("utf-8")).hexdigest()
+
+
+async def send_async_kgml_request(pathway_code: str, client: KeggClient) -> tuple[str, str]:
+    """Queries KEGG for a pathway and returns a tuple of path code and the pathway in KGML format
+
+    Raises:
+      FetchError: the request failed after all retries or KEGG rejected it
+    """
+    url = pathway_kgml_url(pathway_code, client.base_url)
+    response = await client.get(url)
+    if not rest_response_validator(response):
+        raise FetchError(url, f"status code {response.status_code}")
 
     return pathway_code, response.text
 
 
-async def send_async_kgml_request(pathway_code: str) -> tuple[str, str]:
-    """Async wrapper for the KGML requester"""
-    return await asyncio.to_thread(get_pathway_kgml, pathway_code)
+async def fetch_pathway_kgml(pathway_code: str, client: KeggClient) -> tuple[str, str] | PathwayFailure:
+    """Like ``send_async_kgml_request`` but returns a ``PathwayFailure`` instead of raising"""
+    try:
+        return await send_async_kgml_request(pathway_code, client)
+    except FetchError as error:
+        return PathwayFailure(pathway_code, error.reason)
+
+
+async def fetch_pathway_batch(
+    pathway_codes: list[str], client: KeggClient
+) -> list[tuple[str, str] | PathwayFailure]:
+    """Queries KEGG for up to ``MAX_BATCH_SIZE`` pathways in one flat file request
+
+    Returns a tuple of path code and flat file entry, or a ``PathwayFailure``,
+    for every requested pathway in the order they were given.
+    """
+    url = pathway_text_url("+".join(pathway_codes), client.base_url)
+    try:
+        response = await client.get(url)
+        if not rest_response_validator(response):
+            raise FetchError(url, f"status code {response.status_code}")
+    except FetchError as error:
+        return [PathwayFailure(path_code, error.reason) for path_code in pathway_codes]
+
+    entries = split_flat_file_entries(response.text)
+    return [
+        (path_code, entries[path_code])
+        if path_code in entries
+        else PathwayFailure(path_code, "missing from the batch response")
+        for path_code in pathway_codes
+    ]
+
+
+def batched(items: list, size: int) -> list[list]:
+    """Splits a list into consecutive chunks of at most ``size`` items"""
+    return [items[i : i + size] for i in range(0, len(items), size)]
+
+
+def split_flat_file_entries(flat_file: str) -> dict[str, str]:
+    """Splits a multi-entry KEGG flat file on the ``///`` terminators into entries keyed by their ENTRY code"""
+    entries = {}
+    for entry in flat_file.split("\n///"):
+        entry = entry.strip("\n")
+        if entry.startswith("ENTRY"):
+            entries[entry.split()[1]] = entry
+    return entries
+
+
+def build_path_from_text(path_code: str, flat_file: str) -> list[str]:
+    """Parses a KEGG flat file entry and extracts the Compounds listed in its COMPOUND section"""
+    regex = re.compile("C[0-9]{5}")
+    compound_list = [
+        path_code,
+    ]
+    in_section = False
+    for line in flat_file.splitlines():
+        if line[:1].strip():
+            in_section = line.startswith("COMPOUND ")
+        if in_section:
+            match = regex.match(line[12:])
+            if match:
+                compound_list.append(match.group())
+
+    return compound_list
+
+
+def extract_compounds(path_code: str, document: str, pathway_format: str = "kgml") -> list[str]:
+    """Extracts the Compounds of a pathway document in the given format
+
+    KGML is streamed through ``kgml.iter_kgml_compounds`` so no element tree is built.
+
+    Raises:
+      ET.ParseError: a KGML document is not well-formed XML
+    """
+    if pathway_format == "text":
+        return build_path_from_text(path_code, document)
+    return [path_code, *kgml.iter_kgml_compounds(kgml.iter_chunks(document))]
+
+
+def unique_entities(entities: dict[str, list[str]]) -> dict[str, list[str]]:
+    """Drops repeated IDs of every entity type but Compounds, keeping the order of first appearance"""
+    return {
+        entity_type: ids if entity_type == "compound" else list(dict.fromkeys(ids))
+        for entity_type, ids in entities.items()
+    }
+
+
+def build_entities_from_text(
+    path_code: str, flat_file: str, entity_types: Iterable[str] = TEXT_ENTITY_TYPES
+) -> dict[str, list[str]]:
+    """Parses a KEGG flat file entry and extracts the IDs of the selected ``TEXT_ENTITY_TYPES``
+
+    Genes come from the GENE section prefixed with the organism code, KOs from
+    the GENE or ORTHOLOGY section and linked maps from the REL_PATHWAY section.
+    """
+    entities = {entity_type: [] for entity_type in entity_types}
+    organism = re.match("[a-z]*", path_code).group()
+    section = None
+    for line in flat_file.splitlines():
+        if line[:1].strip():
+            section = line[:12].strip()
+        field_value = line[12:]
+        if section == "COMPOUND" and "compound" in entities:
+            match = kgml.COMPOUND_RE.match(field_value)
+            if match:
+                entities["compound"].append(match.group())
+        elif section == "GENE":
+            if "gene" in entities and field_value.strip():
+                entities["gene"].append(f"{organism}:{field_value.split()[0]}")
+            if "ortholog" in entities:
+                for orthologs in re.findall(r"\[KO:([^\]]*)\]", field_value):
+                    entities["ortholog"].extend(orthologs.split())
+        elif section == "ORTHOLOGY" and "ortholog" in entities and field_value.strip():
+            entities["ortholog"].append(field_value.split()[0])
+        elif section == "REL_PATHWAY" and "map" in entities and field_value.strip():
+            entities["map"].append(field_value.split()[0])
+    return unique_entities(entities)
+
+
+def extract_entities(
+    path_code: str, document: str, pathway_format: str = "kgml", entity_types: Iterable[str] = ("compound",)
+) -> dict[str, list[str]]:
+    """Extracts the IDs of the selected entity types of a pathway document in one pass
+
+    Compounds are listed once per occurrence as by ``extract_compounds``, other
+    entity types once per pathway in order of first appearance.
+
+    Raises:
+      ET.ParseError: a KGML document is not well-formed XML
+    """
+    if pathway_format == "text":
+        return build_entities_from_text(path_code, document, entity_types)
+    entities = {entity_type: [] for entity_type in entity_types}
+    for entity_type, entity in kgml.iter_kgml_entities(kgml.iter_chunks(document), entity_types):
+        entities[entity_type].append(entity)
+    return unique_entities(entities)
+
+
+@contextmanager
+def atomic_write(path: str | os.PathLike, mode: str = "w") -> Iterator[IO]:
+    """Opens a temporary file for writing that replaces ``path`` once it is complete
+
+    Readers never see a partly written file, and a failed write leaves the old file in place.
+    """
+    tmp_path = f"{path}.tmp"
+    try:
+        with open(tmp_path, mode) as fh:
+            yield fh
+    except BaseException:
+        os.remove(tmp_path)
+        raise
+    os.replace(tmp_path, path)
+
+
+def write_failures(failures: list[PathwayFailure], output_file: str) -> None:
+    """Writes the failed pathway codes and the reasons as a tab separated file"""
+    with open(output_file, "w") as fh:
+        fh.writelines(f"{failure.pathway_code}\t{failure.reason}\n" for failure in failures)
 
 
 def build_path_from_kgml(path_code: str, root: ET.Element) -> list[str]:
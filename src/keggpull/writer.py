@@ -0,0 +1,172 @@
+import itertools
+import json
+from collections.abc import Iterable, Iterator
+from typing import TextIO
+
+from .logger import logger
+
+__author__ = "R-Grosman"
+__copyright__ = "R-Grosman"
+__license__ = "MIT"
+__version__ = "0.2.0"
+
+
+COLUMNAR_FORMATS = ("arrow", "feather", "parquet")
+OUTPUT_FORMATS = ("wide", "long", *COLUMNAR_FORMATS)
+OUTPUT_EXTENSIONS = {"wide": "tsv", "long": "tsv", "arrow": "arrow", "feather": "feather", "parquet": "parquet"}
+# (pathway, compound) rows per Arrow record batch
+BATCH_ROWS = 64 * 1024
+
+
+def write_wide_rows(fh: TextIO, columns: Iterable[tuple[str, Iterable[str]]]) -> int:
+    """Streams pathway columns as a wide tab separated table, one row at a time
+
+    ``columns`` are (path code, Compounds) pairs written in the given order: the
+    header row holds the path codes and every following row the next Compound of
+    each pathway, with empty cells below the shorter ones. Neither a padded nor a
+    transposed copy of the table is built. Returns the number of rows written.
+    """
+    columns = list(columns)
+    fh.write("\t".join(path_code for path_code, _ in columns) + "\n")
+    rows = 1
+    for row in itertools.zip_longest(*(compounds for _, compounds in columns), fillvalue=""):
+        fh.write("\t".join(row) + "\n")
+        rows += 1
+    return rows
+
+
+def write_wide_table(columns: Iterable[tuple[str, Iterable[str]]], output_file: str) -> None:
+    """Writes pathway columns sorted by path code to a wide tab separated file"""
+    columns = sorted(columns, key=lambda column: column[0])
+    with open(output_file, "w") as fh:
+        write_wide_rows(fh, columns)
+    logger.info(f"Table created: {output_file}")
+
+
+def iter_long_rows(columns: Iterable[tuple[str, Iterable[str]]]) -> Iterator[tuple[str, str]]:
+    """Yields one (path code, Compound) pair per pathway membership"""
+    for path_code, compounds in columns:
+        for compound in compounds:
+            yield path_code, compound
+
+
+def write_long_table(
+    columns: Iterable[tuple[str, Iterable[str]]],
+    output_file: str,
+    pathway_names: dict[str, str] | None = None,
+    entity_type: str = "compound",
+    annotations: dict[str, dict[str, str]] | None = None,
+) -> None:
+    """Writes pathway columns sorted by path code as a long tab separated file, one pathway and Compound per row
+
+    ``entity_type`` names the Compound column of tables of other entities.
+    ``annotations`` (column name to values by Compound) are joined as
+    additional columns, empty for Compounds without a value.
+    """
+    pathway_names = pathway_names or {}
+    annotations = annotations or {}
+    columns = sorted(columns, key=lambda column: column[0])
+    with open(output_file, "w") as fh:
+        fh.write("\t".join(["pathway", "pathway_name", entity_type, *annotations]) + "\n")
+        for path_code, compound in iter_long_rows(columns):
+            values = "".join(f"\t{values.get(compound, '')}" for values in annotations.values())
+            fh.write(f"{path_code}\t{pathway_names.get(path_code, '')}\t{compound}{values}\n")
+    logger.info(f"Table created: {output_file}")
+
+
+def write_columnar_table(
+    columns: Iterable[tuple[str, Iterable[str]]],
+    output_file: str,
+    output_format: str = "parquet",
+    pathway_names: dict[str, str] | None = None,
+    release: str | None = None,
+    entity_type: str = "compound",
+    annotations: dict[str, dict[str, str]] | None = None,
+) -> None:
+    """Writes pathway columns in long layout as Arrow IPC, Feather or Parquet, ``BATCH_ROWS`` rows at a time
+
+    The KEGG release and the pathway names are stored in the schema metadata,
+    ``entity_type`` names the Compound column and ``annotations`` are joined
+    as string columns, null for Compounds without a value.
+
+    Raises:
+      ImportError: PyArrow is not installed, it comes with ``pip install KEGGpull[arrow]``
+    """
+    try:
+        import pyarrow as pa
+        import pyarrow.ipc
+        import pyarrow.parquet
+    except ImportError as error:
+        raise ImportError(
+            f"{output_format} output requires PyArrow, install it with: pip install KEGGpull[arrow]"
+        ) from error
+
+    pathway_names = pathway_names or {}
+    annotations = annotations or {}
+    columns = sorted(columns, key=lambda column: column[0])
+    path_codes = [path_code for path_code, _ in columns]
+    names = [pathway_names.get(path_code, "") for path_code in path_codes]
+    metadata = {
+        "kegg_release": release or "",
+        "pathway_names": json.dumps(dict(zip(path_codes, names))),
+    }
+    string_dictionary = pa.dictionary(pa.int32(), pa.string())
+    schema = pa.schema(
+        [
+            ("pathway", string_dictionary),
+            ("pathway_name", string_dictionary),
+            (entity_type, pa.string()),
+            *((column, pa.string()) for column in annotations),
+        ],
+        metadata=metadata,
+    )
+    # IPC files allow one dictionary per field, so every batch shares the full one indexed by column
+    path_dictionary = pa.array(path_codes, pa.string())
+    name_dictionary = pa.array(names, pa.string())
+    if output_format == "parquet":
+        writer = pyarrow.parquet.ParquetWriter(output_file, schema)
+    else:
+        writer = pyarrow.ipc.new_file(output_file, schema)
+
+    with writer:
+        rows = iter_long_rows((column, compounds) for column, (_, compounds) in enumerate(columns))
+        while batch := list(itertools.islice(rows, BATCH_ROWS)):
+            column_indices, compounds = zip(*batch)
+            column_indices = pa.array(column_indices, pa.int32())
+            record_batch = pa.record_batch(
+                [
+                    pa.DictionaryArray.from_arrays(column_indices, path_dictionary),
+                    pa.DictionaryArray.from_arrays(column_indices, name_dictionary),
+                    pa.array(compounds, pa.string()),
+                    *(
+                        pa.array([values.get(compound) for compound in compounds], pa.string())
+                        for values in annotations.values()
+                    ),
+                ],
+                schema=schema,
+            )
+            writer.write_batch(record_batch)
+    logger.info(f"Table created: {output_file}")
+
+
+def write_table(
+    columns: Iterable[tuple[str, Iterable[str]]],
+    output_file: str,
+    output_format: str = "wide",
+    pathway_names: dict[str, str] | None = None,
+    release: str | None = None,
+    entity_type: str = "compound",
+    annotations: dict[str, dict[str, str]] | None = None,
+) -> None:
+    """Writes pathway columns in one of the ``OUTPUT_FORMATS``
+
+    ``annotations`` are joined into the long layouts, wide tables have no row per Compound to join them to.
+    """
+    if output_format == "wide":
+        write_wide_table(columns, output_file)
+    elif output_format == "long":
+        write_long_table(columns, output_file, pathway_names, entity_type, annotations)
+    elif output_format in COLUMNAR_FORMATS:
+        write_columnar_table(columns, output_file, output_format, pathway_names, release, entity_type, annotations)
+    else:
+        raise ValueError(f"unknown output format {output_format!r}, expected one of {OUTPUT_FORMATS}")
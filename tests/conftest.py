@@ -1,10 +1,23 @@
 """
-    Dummy conftest.py for keggpull.
+    Fixtures shared by the keggpull tests.
 
-    If you don't know what this is for, just leave it empty.
+    ``kegg_standin`` is a local stand-in for the KEGG REST API serving the
+    recorded data in tests/data, see standin.py, and ``run_with_standin`` runs
+    a coroutine function with a ``KeggClient`` of a new stand-in server.
     Read more about conftest.py under:
     - https://docs.pytest.org/en/stable/fixture.html
-    - https://docs.pytest.org/en/stable/writing_plugins.html
 """
 
-# import pytest
+import pytest
+
+from standin import KeggStandIn
+
+
+@pytest.fixture
+def kegg_standin() -> KeggStandIn:
+    return KeggStandIn()
+
+
+@pytest.fixture
+def run_with_standin(kegg_standin):
+    return kegg_standin.run
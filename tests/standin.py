@@ -0,0 +1,121 @@
+"""A stand-in for the KEGG REST API, shared by the tests and the offline benchmarks"""
+
+import asyncio
+from pathlib import Path
+
+from aiohttp import web
+from aiohttp.test_utils import TestServer
+
+from keggpull.client import KeggClient
+from keggpull.scheduler import Scheduler
+
+DATA_DIR = Path(__file__).parent / "data"
+
+
+class KeggStandIn:
+    """A local stand-in for the KEGG REST API serving the recorded test data"""
+
+    def __init__(self):
+        self.pathway_list = (DATA_DIR / "hsa_pathway_list.tsv").read_text()
+        self.kgml = (DATA_DIR / "hsa00010.kgml").read_text()
+        self.flat_file = (DATA_DIR / "hsa00010.txt").read_text()
+        self.requested = []
+        self.peers = set()
+        # request path -> status codes to answer with before serving the data
+        self.errors = {}
+        self.release = "106.0+/05-21"
+
+    @property
+    def app(self) -> web.Application:
+        """A new application for every server, an application is bound to one event loop"""
+        app = web.Application(middlewares=[self.record])
+        app.router.add_get("/info/{database}", self.info)
+        app.router.add_get("/list/organism", self.list_organism)
+        app.router.add_get("/list/pathway", self.list_reference_pathway)
+        app.router.add_get("/list/pathway/{organism}", self.list_pathway)
+        app.router.add_get("/get/{entry}/kgml", self.get_kgml)
+        app.router.add_get("/get/{entries}", self.get_flat_files)
+        app.router.add_get("/list/compound", self.list_compound)
+        app.router.add_get("/find/compound/{query}/{option}", self.find_compound)
+        app.router.add_get("/conv/{database}/compound", self.conv_compound)
+        return app
+
+    def run(self, work, **client_kwargs):
+        """Runs ``work(client)`` to completion with a client of a new server
+
+        Keyword arguments such as ``backoff``, ``retries`` or ``cache`` are passed to
+        the ``KeggClient``, which is not rate limited unless a ``scheduler`` is given.
+        """
+
+        async def run_work():
+            async with TestServer(self.app) as server:
+                client_kwargs.setdefault("scheduler", Scheduler(rate=None))
+                async with KeggClient(str(server.make_url("")), **client_kwargs) as client:
+                    return await work(client)
+
+        return asyncio.run(run_work())
+
+    @web.middleware
+    async def record(self, request: web.Request, handler) -> web.StreamResponse:
+        self.requested.append(request.path)
+        self.peers.add(request.transport.get_extra_info("peername"))
+        if self.errors.get(request.path):
+            return web.Response(status=self.errors[request.path].pop(0))
+        return await handler(request)
+
+    async def info(self, request: web.Request) -> web.Response:
+        return web.Response(
+            text=f"pathway          KEGG Pathway Database\n"
+            f"path             Release {self.release}, May 23\n"
+            f"                 Kyoto University Bioinformatics Center\n"
+        )
+
+    async def list_organism(self, request: web.Request) -> web.Response:
+        return web.Response(
+            text="T01001\thsa\tHomo sapiens (human)\tEukaryotes;Animals;Vertebrates;Mammals\n"
+            "T01002\tmmu\tMus musculus (house mouse)\tEukaryotes;Animals;Vertebrates;Mammals\n"
+        )
+
+    async def list_reference_pathway(self, request: web.Request) -> web.Response:
+        lines = self.pathway_list.splitlines()[:5]
+        return web.Response(
+            text="".join(
+                line.replace("path:hsa", "map").replace(" - Homo sapiens (human)", "") + "\n"
+                for line in lines
+            )
+        )
+
+    async def list_pathway(self, request: web.Request) -> web.Response:
+        organism = request.match_info["organism"]
+        if organism == "hsa":
+            return web.Response(text=self.pathway_list)
+        if organism == "mmu":
+            lines = self.pathway_list.splitlines()[:5]
+            return web.Response(text="".join(line.replace("hsa", "mmu") + "\n" for line in lines))
+        return web.Response(status=400)
+
+    async def get_kgml(self, request: web.Request) -> web.Response:
+        etag = f'"{request.match_info["entry"]}"'
+        if request.headers.get("If-None-Match") == etag:
+            return web.Response(status=304, headers={"ETag": etag})
+        kgml = self.kgml.replace("hsa00010", request.match_info["entry"])
+        return web.Response(text=kgml, headers={"ETag": etag})
+
+    async def get_flat_files(self, request: web.Request) -> web.Response:
+        entries = request.match_info["entries"].split("+")
+        if len(entries) > 10:
+            return web.Response(status=400)
+        return web.Response(text="".join(self.flat_file.replace("hsa00010", entry) for entry in entries))
+
+    async def list_compound(self, request: web.Request) -> web.Response:
+        return web.Response(text="C00022\tPyruvate; Pyruvic acid; 2-Oxopropanoate\nC00033\tAcetate; Acetic acid\n")
+
+    async def find_compound(self, request: web.Request) -> web.Response:
+        values = {"exact_mass": ("88.016", "60.0211"), "mol_weight": ("88.0621", "60.052")}
+        pyruvate, acetate = values[request.match_info["option"]]
+        return web.Response(text=f"cpd:C00022\t{pyruvate}\ncpd:C00033\t{acetate}\n")
+
+    async def conv_compound(self, request: web.Request) -> web.Response:
+        if request.match_info["database"] == "pubchem":
+            return web.Response(text="cpd:C00022\tpubchem:3324\ncpd:C00033\tpubchem:3335\n")
+        return web.Response(text="cpd:C00022\tchebi:15361\ncpd:C00022\tchebi:32816\ncpd:C00033\tchebi:15366\n")
@@ -0,0 +1,65 @@
+import asyncio
+
+import aiohttp
+from aiohttp.test_utils import TestServer
+
+import keggpull
+from keggpull.client import KeggClient
+from keggpull.scheduler import Scheduler
+
+__author__ = "RGmetab"
+__copyright__ = "RGmetab"
+__license__ = "MIT"
+
+
+def test_stream_with_client(kegg_standin, run_with_standin):
+    kegg_standin.errors["/get/mmu00020/kgml"] = [404]
+    failures = []
+
+    async def collect(client):
+        stream = keggpull.stream("mmu", client=client, failures=failures)
+        results = {pathway: compounds async for pathway, compounds in stream}
+        assert not client.session.closed
+        return results
+
+    results = run_with_standin(collect, retries=0)
+    assert sorted(results) == ["mmu00010", "mmu00030", "mmu00040", "mmu00051"]
+    assert results["mmu00010"][0] == "C00033"
+    assert [failure.pathway_code for failure in failures] == ["mmu00020"]
+
+
+def test_stream_with_external_session(kegg_standin):
+    async def collect():
+        async with TestServer(kegg_standin.app) as server:
+            async with aiohttp.ClientSession() as session:
+                results = [
+                    result
+                    async for result in keggpull.stream(
+                        ["mmu", "mmu"], ["compound", "gene"], base_url=str(server.make_url("")), session=session
+                    )
+                ]
+                assert not session.closed
+        return results
+
+    results = asyncio.run(collect())
+    assert len(results) == 5
+    pathway, entities = results[0]
+    assert entities["gene"][0] == "hsa:226"
+    assert kegg_standin.requested.count("/get/mmu00010/kgml") == 1
+
+
+def test_stream_sync_on_external_loop(kegg_standin):
+    loop = asyncio.new_event_loop()
+    server = TestServer(kegg_standin.app, loop=loop)
+    loop.run_until_complete(server.start_server())
+    client = KeggClient(str(server.make_url("")), scheduler=Scheduler(rate=None))
+    try:
+        results = keggpull.stream_sync("mmu", "gene", client=client, loop=loop)
+        pathway, genes = next(results)
+        assert pathway.startswith("mmu")
+        assert genes[0] == "hsa:226"
+        assert len(list(results)) == 4
+    finally:
+        loop.run_until_complete(client.close())
+        loop.run_until_complete(server.close())
+        loop.close()
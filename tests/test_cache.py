@@ -0,0 +1,99 @@
+import asyncio
+import os
+
+import pytest
+
+from keggpull.cache import ResponseCache
+from keggpull.client import FetchError, KeggClient
+
+__author__ = "RGmetab"
+__copyright__ = "RGmetab"
+__license__ = "MIT"
+
+
+def test_response_cache_roundtrip(tmp_path):
+    cache = ResponseCache(tmp_path)
+    cache.put("get/hsa00010/kgml", b"<pathway/>", etag='"v1"')
+
+    entry = ResponseCache(tmp_path).get("get/hsa00010/kgml")
+    assert entry.content == b"<pathway/>"
+    assert entry.revalidation_headers() == {"If-None-Match": '"v1"'}
+    assert cache.is_fresh(entry)
+    assert cache.get("get/hsa00020/kgml") is None
+
+
+def test_response_cache_ttl(tmp_path):
+    cache = ResponseCache(tmp_path, ttl=60)
+    entry = cache.put("list/pathway/hsa", b"path:hsa00010")
+    entry.fetched -= 120
+    assert not cache.is_fresh(entry)
+    assert cache.is_fresh(cache.refresh(entry))
+    assert ResponseCache(tmp_path, ttl=60, offline=True).is_fresh(entry)
+
+
+def test_response_cache_evicts_least_recently_used(tmp_path):
+    cache = ResponseCache(tmp_path, max_size=25)
+    cache.put("get/a", b"a" * 10)
+    cache.put("get/b", b"b" * 10)
+    body_a = cache._paths("get/a")[0]
+    os.utime(body_a, (0, 0))
+    cache.get("get/b")
+    cache.put("get/c", b"c" * 10)
+
+    assert cache.get("get/a") is None
+    assert cache.get("get/b").content == b"b" * 10
+    assert cache.get("get/c").content == b"c" * 10
+
+
+def test_response_cache_evicts_to_low_water_mark(tmp_path):
+    cache = ResponseCache(tmp_path, max_size=100)
+    for number in range(11):
+        cache.put(f"get/{number}", b"x" * 10)
+        os.utime(cache._paths(f"get/{number}")[0], (number, number))
+    assert cache._size == 90
+    assert cache.get("get/0") is None and cache.get("get/1") is None
+
+    cache.put("get/11", b"x" * 10)
+    assert cache._size == 100
+    assert cache.get("get/2") is not None
+
+
+def test_kegg_client_serves_and_revalidates_from_cache(kegg_standin, run_with_standin, tmp_path):
+    cache = ResponseCache(tmp_path, ttl=60)
+
+    async def fetch_thrice(client):
+        url = f"{client.base_url}/get/hsa00010/kgml"
+        first = await client.get(url)
+        second = await client.get(url)
+        cache.ttl = 0
+        third = await client.get(url)
+        return first, second, third
+
+    first, second, third = run_with_standin(fetch_thrice, cache=cache)
+
+    assert not first.from_cache
+    assert second.from_cache and second.content == first.content
+    assert third.from_cache and third.content == first.content
+    assert kegg_standin.requested == ["/get/hsa00010/kgml", "/get/hsa00010/kgml"]
+
+
+def test_kegg_client_offline_miss(tmp_path):
+    cache = ResponseCache(tmp_path, offline=True)
+
+    async def fetch():
+        async with KeggClient(cache=cache) as client:
+            return await client.get(f"{client.base_url}/get/hsa00010/kgml")
+
+    with pytest.raises(FetchError):
+        asyncio.run(fetch())
+
+
+def test_kegg_client_offline_uncached_request(kegg_standin, run_with_standin, tmp_path):
+    cache = ResponseCache(tmp_path, offline=True)
+
+    async def fetch(client):
+        return await client.get(f"{client.base_url}/info/pathway", use_cache=False)
+
+    with pytest.raises(FetchError, match="offline"):
+        run_with_standin(fetch, cache=cache)
+    assert kegg_standin.requested == []
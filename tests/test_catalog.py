@@ -0,0 +1,54 @@
+from keggpull.cache import ResponseCache
+from keggpull.catalog import CompoundCatalog, load_compound_catalog
+
+__author__ = "RGmetab"
+__copyright__ = "RGmetab"
+__license__ = "MIT"
+
+
+def load_with_standin(kegg_standin, path=None, **client_kwargs):
+    return kegg_standin.run(lambda client: load_compound_catalog(client, path), **client_kwargs)
+
+
+def test_fetch_compound_catalog(kegg_standin):
+    catalog = load_with_standin(kegg_standin)
+
+    assert len(catalog) == 2
+    assert catalog.release == "106.0+/05-21"
+    assert catalog.get("C00022", "name") == "Pyruvate"
+    assert catalog.get("C00033", "exact_mass") == "60.0211"
+    assert catalog.get("C00022", "chebi") == "15361,32816"
+    assert catalog.column("pubchem") == {"C00022": "3324", "C00033": "3335"}
+    assert catalog.get("C99999", "name") == ""
+    assert len(kegg_standin.requested) == 1 + 5
+
+
+def test_compound_catalog_table_is_reused(kegg_standin, tmp_path):
+    catalog_file = tmp_path / "compounds.tsv"
+    assert len(CompoundCatalog.load(catalog_file)) == 0
+    fetched = load_with_standin(kegg_standin, catalog_file)
+    assert catalog_file.read_text().splitlines()[:3] == [
+        "# kegg_compound_release\t106.0+/05-21",
+        "compound\tname\texact_mass\tmol_weight\tpubchem\tchebi",
+        "C00022\tPyruvate\t88.016\t88.0621\t3324\t15361,32816",
+    ]
+
+    kegg_standin.requested.clear()
+    reused = load_with_standin(kegg_standin, catalog_file)
+    assert kegg_standin.requested == ["/info/compound"]
+    assert reused.records == fetched.records
+
+    kegg_standin.requested.clear()
+    kegg_standin.release = "107.0+/06-01"
+    assert load_with_standin(kegg_standin, catalog_file).release == "107.0+/06-01"
+    assert len(kegg_standin.requested) == 1 + 5
+
+
+def test_compound_catalog_table_is_reused_offline(kegg_standin, tmp_path):
+    catalog_file = tmp_path / "compounds.tsv"
+    load_with_standin(kegg_standin, catalog_file)
+
+    kegg_standin.requested.clear()
+    cache = ResponseCache(tmp_path / "cache", offline=True)
+    assert load_with_standin(kegg_standin, catalog_file, cache=cache).get("C00022", "name") == "Pyruvate"
+    assert kegg_standin.requested == []
@@ -0,0 +1,47 @@
+from keggpull.client import KeggResponse
+from keggpull.utilities import (
+    PathwayFailure,
+    fetch_pathway_kgml,
+    get_organism_pathways,
+    send_async_kgml_request,
+)
+
+__author__ = "RGmetab"
+__copyright__ = "RGmetab"
+__license__ = "MIT"
+
+
+def test_kegg_response_text():
+    response = KeggResponse("https://rest.kegg.jp/get/hsa00010/kgml", 200, b"<pathway/>")
+    assert response.text == "<pathway/>"
+
+
+def test_kegg_client_reuses_connections(kegg_standin, run_with_standin):
+    async def fetch(client):
+        pathways = await get_organism_pathways("hsa", client)
+        responses = [await send_async_kgml_request(code, client) for code in ["hsa00010", "hsa00020", "hsa00030"]]
+        return pathways, responses
+
+    pathways, responses = run_with_standin(fetch)
+
+    assert pathways.startswith("path:hsa00010")
+    assert [code for code, _ in responses] == ["hsa00010", "hsa00020", "hsa00030"]
+    assert 'name="path:hsa00020"' in responses[1][1]
+    assert len(kegg_standin.requested) == 4
+    assert len(kegg_standin.peers) == 1
+
+
+def test_kegg_client_retries_transient_errors(kegg_standin, run_with_standin):
+    kegg_standin.errors["/get/hsa00010/kgml"] = [503, 429, 403]
+
+    response = run_with_standin(lambda client: send_async_kgml_request("hsa00010", client), backoff=0.01)
+    assert response[0] == "hsa00010"
+    assert len(kegg_standin.requested) == 4
+
+
+def test_kegg_client_gives_up_after_retries(kegg_standin, run_with_standin):
+    kegg_standin.errors["/get/hsa00010/kgml"] = [500, 500, 500]
+
+    failure = run_with_standin(lambda client: fetch_pathway_kgml("hsa00010", client), retries=1, backoff=0.01)
+    assert failure == PathwayFailure("hsa00010", "status code 500")
+    assert len(kegg_standin.requested) == 2
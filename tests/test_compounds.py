@@ -0,0 +1,42 @@
+import pytest
+
+from keggpull.compounds import CompoundDictionary, PathwayMembership
+
+__author__ = "RGmetab"
+__copyright__ = "RGmetab"
+__license__ = "MIT"
+
+
+def test_compound_dictionary():
+    dictionary = CompoundDictionary(["C00022", "C00024"])
+
+    assert dictionary.encode("C00024") == 1
+    assert dictionary.encode("C00031") == 2
+    assert list(dictionary.encode_all(["C00031", "C00022"])) == [2, 0]
+    assert list(dictionary.decode([1, 2])) == ["C00024", "C00031"]
+    assert dictionary.lookup("C99999") is None
+    assert len(dictionary) == 3
+
+
+def test_pathway_membership():
+    membership = PathwayMembership()
+    membership.add("hsa00010", ["C00022", "C00024", "C00022"])
+    membership.add("hsa00020", [])
+    membership.add("hsa00030", ["C00024"])
+
+    assert list(membership.offsets) == [0, 3, 3, 4]
+    assert list(membership.indices) == [0, 1, 0, 1]
+    assert membership.compounds("hsa00010") == ["C00022", "C00024", "C00022"]
+    assert membership.compound_set("hsa00010") == {0, 1}
+    assert membership.compounds("hsa00020") == []
+    assert [(code, list(compounds)) for code, compounds in membership.columns(["hsa00030"])] == [
+        ("hsa00030", ["C00024"])
+    ]
+    assert "hsa00030" in membership and "hsa00040" not in membership
+
+
+def test_pathway_membership_rejects_duplicate_pathways():
+    membership = PathwayMembership()
+    membership.add("hsa00010", ["C00022"])
+    with pytest.raises(ValueError):
+        membership.add("hsa00010", ["C00022"])
@@ -0,0 +1,63 @@
+import pytest
+
+np = pytest.importorskip("numpy")
+stats = pytest.importorskip("scipy.stats")
+
+from keggpull.compounds import PathwayMembership  # noqa: E402
+from keggpull.enrich import (  # noqa: E402
+    benjamini_hochberg,
+    enrich,
+    read_queries,
+    read_wide_table,
+)
+from keggpull.export import build_matrix  # noqa: E402
+from keggpull.writer import write_wide_table  # noqa: E402
+
+__author__ = "RGmetab"
+__copyright__ = "RGmetab"
+__license__ = "MIT"
+
+
+@pytest.fixture
+def matrix():
+    membership = PathwayMembership()
+    membership.add("hsa00010", ["C00022", "C00024", "C00031", "C00033"])
+    membership.add("hsa00020", ["C00022", "C00036", "C00042"])
+    membership.add("hsa00030", ["C00117", "C00118", "C00119", "C00120"])
+    return build_matrix(membership)
+
+
+def test_benjamini_hochberg():
+    pvalues = np.array([[0.01, 0.04, 0.03, 0.2]])
+    expected = [[0.04, 0.16 / 3, 0.16 / 3, 0.2]]
+    assert np.allclose(benjamini_hochberg(pvalues), expected)
+
+
+def test_enrich_matches_scipy(matrix):
+    queries = {"sample1": ["C00022", "C00024", "C00031", "C99999"], "sample2": ["C00118"]}
+    result = enrich(matrix, queries)
+
+    assert result.background_size == 10
+    assert result.query_sizes.tolist() == [3, 1]
+    assert result.overlaps.tolist() == [[3, 1, 0], [0, 0, 1]]
+    assert result.pvalues[0, 0] == pytest.approx(stats.hypergeom.sf(2, 10, 4, 3))
+    assert result.pvalues[0, 1] == pytest.approx(stats.hypergeom.sf(0, 10, 3, 3))
+    assert result.pvalues[0, 2] == 1.0
+    assert result.qvalues[0, 0] == pytest.approx(result.pvalues[0, 0] * 3)
+
+
+def test_enrich_with_background(matrix):
+    result = enrich(matrix, {"sample": ["C00022", "C00117"]}, background=["C00022", "C00024", "C00117"])
+
+    assert result.background_size == 3
+    assert result.pathway_sizes.tolist() == [2, 1, 1]
+
+
+def test_read_wide_table_and_queries(tmp_path):
+    table = tmp_path / "table.tsv"
+    write_wide_table([("hsa00010", ["C00022", "C00024"]), ("hsa00020", ["C00036"])], str(table))
+    hits = tmp_path / "hits.tsv"
+    hits.write_text("sample1\tC00022\tC00024\n\nsample2 C00036\n")
+
+    assert read_wide_table(str(table)).compounds("hsa00010") == ["C00022", "C00024"]
+    assert read_queries(str(hits)) == {"sample1": ["C00022", "C00024"], "sample2": ["C00036"]}
@@ -0,0 +1,46 @@
+import pytest
+
+from keggpull.compounds import PathwayMembership
+from keggpull.export import build_matrix, export_matrix
+
+__author__ = "RGmetab"
+__copyright__ = "RGmetab"
+__license__ = "MIT"
+
+
+@pytest.fixture
+def membership():
+    membership = PathwayMembership()
+    membership.add("hsa00010", ["C00031", "C00022", "C00031"])
+    membership.add("hsa00020", ["C00024", "C00022"])
+    membership.add("hsa00030", ["C00118"])
+    return membership
+
+
+def test_build_matrix(membership):
+    matrix = build_matrix(membership, ["hsa00010", "hsa00020"])
+
+    assert matrix.rows == ["hsa00010", "hsa00020"]
+    assert matrix.columns == ["C00022", "C00024", "C00031"]
+    assert list(matrix.indptr) == [0, 2, 4]
+    assert list(matrix.indices) == [0, 2, 0, 1]
+    assert matrix.shape == (2, 3)
+
+
+def test_export_matrix_market(membership, tmp_path):
+    prefix = str(tmp_path / "hsa")
+    assert export_matrix(build_matrix(membership), prefix) == f"{prefix}.mtx"
+
+    lines = (tmp_path / "hsa.mtx").read_text().splitlines()
+    assert lines[:3] == ["%%MatrixMarket matrix coordinate integer general", "3 4 5", "1 1 1"]
+    assert (tmp_path / "hsa.rows.txt").read_text().split() == ["hsa00010", "hsa00020", "hsa00030"]
+    assert (tmp_path / "hsa.cols.txt").read_text().split() == ["C00022", "C00024", "C00031", "C00118"]
+
+
+def test_export_npz(membership, tmp_path):
+    sparse = pytest.importorskip("scipy.sparse")
+    export_matrix(build_matrix(membership), str(tmp_path / "hsa"), "npz")
+
+    matrix = sparse.load_npz(tmp_path / "hsa.npz")
+    assert matrix.shape == (3, 4)
+    assert matrix.toarray().tolist() == [[1, 0, 1, 0], [1, 1, 0, 0], [0, 0, 0, 1]]
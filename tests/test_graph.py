@@ -0,0 +1,61 @@
+from keggpull.compounds import PathwayMembership
+from keggpull.graph import ReactionGraph, build_reaction_graph, parse_equation
+from keggpull.utilities import extract_entities
+
+__author__ = "RGmetab"
+__copyright__ = "RGmetab"
+__license__ = "MIT"
+
+
+def test_parse_equation():
+    equation = parse_equation("R00014: C00068 + C00022 => C05125")
+
+    assert equation.reaction == "R00014"
+    assert equation.substrates == ["C00068", "C00022"]
+    assert equation.products == ["C05125"]
+    assert not equation.reversible
+    assert parse_equation("R00710: C00084 <=> C00033").reversible
+
+
+def test_reaction_graph_roundtrip(tmp_path):
+    equations = PathwayMembership()
+    equations.add("hsa00010", ["R00014: C00068 + C00022 => C05125", "R00710: C00084 <=> C00033"])
+    equations.add("hsa00020", ["R00710: C00084 <=> C00033"])
+    graph = build_reaction_graph(equations, metadata={"kegg_release": "106.0"})
+    graph.save(tmp_path / "hsa.graph")
+
+    with ReactionGraph.load(tmp_path / "hsa.graph") as loaded:
+        assert loaded.metadata == {"kegg_release": "106.0"}
+        assert loaded.substrates("R00014") == ["C00068", "C00022"]
+        assert loaded.consumers("C00033") == ["R00710"]
+        assert loaded.producers("C00033") == ["R00710"]
+        assert loaded.producers("C05125") == ["R00014"]
+        assert loaded.successors("C00022") == {"C05125"}
+        assert loaded.successors("C00033") == {"C00084"}
+        assert loaded.pathway_reactions("hsa00020") == ["R00710"]
+        assert loaded.edges == graph.edges == 5
+
+
+def test_reaction_graph_merges_equations_across_pathways():
+    equations = PathwayMembership()
+    equations.add("hsa00010", ["R00200: C00074 => C00022", "R00014: C00068 + C00022 => C05125"])
+    equations.add("hsa00620", ["R00200: C00022 => C00074 + C00008", "R00014: C00022 => C05125 + C00011"])
+    graph = build_reaction_graph(equations)
+
+    assert graph.substrates("R00200") == ["C00074", "C00008"]
+    assert graph.products("R00200") == ["C00022"]
+    assert graph.is_reversible("R00200")
+    assert graph.products("R00014") == ["C05125", "C00011"]
+    assert not graph.is_reversible("R00014")
+    assert "C00011" in graph.successors("C00022")
+
+
+def test_reaction_graph_from_kgml():
+    with open("tests/data/hsa00010.kgml", "r") as fh:
+        entities = extract_entities("hsa00010", fh.read(), "kgml", ("equation",))
+    equations = PathwayMembership()
+    equations.add("hsa00010", entities["equation"])
+    graph = build_reaction_graph(equations)
+
+    assert len(graph.reactions) == len(graph.pathway_reactions("hsa00010")) == 34
+    assert "C00084" in graph.successors("C00469")
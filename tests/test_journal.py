@@ -0,0 +1,55 @@
+from keggpull.journal import Journal
+from keggpull.utilities import ExtractedPathway
+
+__author__ = "RGmetab"
+__copyright__ = "RGmetab"
+__license__ = "MIT"
+
+
+def test_journal_roundtrip(tmp_path):
+    journal_file = tmp_path / "run.journal"
+    journal = Journal(journal_file, "106.0", ["compound", "gene"])
+    assert journal.load() == {}
+
+    journal.open()
+    journal.append(ExtractedPathway("hsa00010", ["C00022"], "abc", {"gene": ["hsa:226"]}))
+    journal.close()
+    journal.open(append=True)
+    journal.append(ExtractedPathway("hsa00020", ["C00024"], "def"))
+    journal.close()
+
+    entries = Journal(journal_file, "106.0", ["compound", "gene"]).load()
+    assert list(entries) == ["hsa00010", "hsa00020"]
+    assert entries["hsa00010"].members("gene") == ["hsa:226"]
+    assert entries["hsa00020"].content_hash == "def"
+
+
+def test_journal_skips_torn_line(tmp_path):
+    journal_file = tmp_path / "run.journal"
+    journal = Journal(journal_file, "106.0", ["compound"])
+    journal.open()
+    journal.append(ExtractedPathway("hsa00010", ["C00022"], "abc"))
+    journal.close()
+    with open(journal_file, "a") as fh:
+        fh.write('{"pathway_code": "hsa00020", "content')
+
+    assert list(journal.load()) == ["hsa00010"]
+
+    journal.open(append=True)
+    journal.append(ExtractedPathway("hsa00030", ["C00031"], "ghi"))
+    journal.close()
+    assert list(journal.load()) == ["hsa00010", "hsa00030"]
+
+
+def test_journal_ignores_other_release(tmp_path):
+    journal_file = tmp_path / "run.journal"
+    journal = Journal(journal_file, "106.0", ["compound"])
+    journal.open()
+    journal.append(ExtractedPathway("hsa00010", ["C00022"], "abc"))
+    journal.close()
+
+    assert Journal(journal_file, "107.0", ["compound"]).load() == {}
+    assert Journal(journal_file, "106.0", ["compound", "gene"]).load() == {}
+
+    journal.remove()
+    assert not journal_file.exists()
@@ -0,0 +1,65 @@
+import xml.etree.ElementTree as ET
+
+import pytest
+
+from keggpull.kgml import iter_chunks, iter_kgml_compounds, iter_kgml_entities
+from keggpull.utilities import build_path_from_kgml
+
+__author__ = "RGmetab"
+__copyright__ = "RGmetab"
+__license__ = "MIT"
+
+
+def test_iter_chunks():
+    assert list(iter_chunks(b"abcdefg", 3)) == [b"abc", b"def", b"g"]
+
+
+def test_iter_kgml_compounds_matches_element_tree():
+    with open("tests/data/hsa00010.kgml", "rb") as fh:
+        document = fh.read()
+
+    streamed = list(iter_kgml_compounds(iter_chunks(document, 97)))
+    assert ["hsa00010", *streamed] == build_path_from_kgml("hsa00010", ET.fromstring(document))
+
+
+def test_iter_kgml_compounds_skips_nested_and_other_entries():
+    document = (
+        '<pathway name="path:hsa00010">'
+        '<entry id="1" name="cpd:C00022 cpd:C00024" type="compound"/>'
+        '<entry id="2" name="hsa:226" type="gene"/>'
+        '<reaction id="2" name="rn:R01070"><substrate id="1" name="cpd:C00031"/></reaction>'
+        "</pathway>"
+    )
+    assert list(iter_kgml_compounds([document])) == ["C00022", "C00024"]
+
+
+def test_iter_kgml_compounds_invalid_xml():
+    with pytest.raises(ET.ParseError):
+        list(iter_kgml_compounds(["<pathway><entry></pathway>"]))
+
+
+def test_iter_kgml_entities_single_pass():
+    document = (
+        '<pathway name="path:hsa00010">'
+        '<entry id="1" name="cpd:C00022" type="compound"/>'
+        '<entry id="2" name="hsa:226 hsa:229" type="gene" reaction="rn:R01070"/>'
+        '<entry id="3" name="ko:K01905" type="ortholog"/>'
+        '<entry id="4" name="path:hsa00020" type="map"/>'
+        '<relation entry1="2" entry2="4" type="maplink"><subtype name="compound" value="1"/></relation>'
+        '<reaction id="2" name="rn:R01070 rn:R01068" type="reversible">'
+        '<substrate id="1" name="cpd:C00022"/><product id="5" name="cpd:C00111"/></reaction>'
+        "</pathway>"
+    )
+    assert list(iter_kgml_entities(iter_chunks(document, 16))) == [
+        ("compound", "C00022"),
+        ("gene", "hsa:226"),
+        ("gene", "hsa:229"),
+        ("ortholog", "K01905"),
+        ("map", "hsa00020"),
+        ("relation", "hsa:226 hsa:229|maplink|path:hsa00020"),
+        ("reaction", "R01070"),
+        ("reaction", "R01068"),
+        ("equation", "R01070: C00022 <=> C00111"),
+        ("equation", "R01068: C00022 <=> C00111"),
+    ]
+    assert list(iter_kgml_entities([document], ("map",))) == [("map", "hsa00020")]
@@ -1,6 +1,16 @@
+import asyncio
+import json
+import subprocess
+import sys
+
 import pytest
 
-from keggpull.main import main
+from keggpull.argparser import init_parser
+from keggpull.cache import ResponseCache
+from keggpull.client import FetchError
+from keggpull import Snapshot
+from keggpull.graph import ReactionGraph
+from keggpull.main import main, run
 
 __author__ = "RGmetab"
 __copyright__ = "RGmetab"
@@ -9,3 +19,260 @@ __license__ = "MIT"
 def test_main():
     with pytest.raises(Exception) as e_info:
         main(organism_code=None)
+
+
+def test_main_with_standin(run_with_standin, tmp_path):
+    output_file = tmp_path / "hsa.tsv"
+    args = init_parser().parse_args(["-o", "hsa", "-of", str(output_file)])
+    run_with_standin(lambda client: main(args, client))
+
+    rows = output_file.read_text().splitlines()
+    header = rows[0].split("\t")
+    assert len(header) == 352
+    assert header[0] == "hsa00010"
+    assert rows[1].split("\t")[0] == "C00033"
+
+
+def test_main_isolates_failed_pathways(kegg_standin, run_with_standin, tmp_path):
+    output_file = tmp_path / "hsa.tsv"
+    args = init_parser().parse_args(["-o", "hsa", "-of", str(output_file), "--retries", "0"])
+    kegg_standin.errors["/get/hsa00020/kgml"] = [500]
+    kegg_standin.errors["/get/hsa00030/kgml"] = [404]
+    failures = run_with_standin(lambda client: main(args, client), retries=0)
+
+    assert sorted(failure.pathway_code for failure in failures) == ["hsa00020", "hsa00030"]
+    assert len(output_file.read_text().splitlines()[0].split("\t")) == 350
+    assert "hsa00020\tstatus code 500" in (tmp_path / "hsa.tsv.failed.tsv").read_text()
+
+
+def test_main_batches_flat_files(kegg_standin, run_with_standin, tmp_path):
+    output_file = tmp_path / "hsa.tsv"
+    args = init_parser().parse_args(["-o", "hsa", "-of", str(output_file), "-f", "text"])
+    assert run_with_standin(lambda client: main(args, client)) == []
+    assert len(kegg_standin.requested) == 1 + 36
+    rows = output_file.read_text().splitlines()
+    assert len(rows[0].split("\t")) == 352
+    assert rows[1].split("\t")[0] == "C00022"
+
+
+def pull_with_standin(kegg_standin, argv, **client_kwargs):
+    args = init_parser().parse_args(argv)
+    return kegg_standin.run(lambda client: main(args, client), **client_kwargs)
+
+
+def test_main_one_table_per_organism(kegg_standin, tmp_path):
+    template = str(tmp_path / "{organism}.tsv")
+    assert pull_with_standin(kegg_standin, ["-o", "all", "-of", template]) == []
+
+    assert "/list/organism" in kegg_standin.requested
+    assert len((tmp_path / "hsa.tsv").read_text().splitlines()[0].split("\t")) == 352
+    assert (tmp_path / "mmu.tsv").read_text().splitlines()[0].split("\t") == [
+        "mmu00010", "mmu00020", "mmu00030", "mmu00040", "mmu00051"
+    ]
+
+
+def test_main_isolates_failed_organisms(kegg_standin, tmp_path):
+    template = str(tmp_path / "{organism}.tsv")
+    failures = pull_with_standin(kegg_standin, ["-o", "hsa", "mmu", "xyz", "-of", template])
+
+    assert [failure.pathway_code for failure in failures] == ["xyz"]
+    assert "status code 400" in failures[0].reason
+    assert sorted(path.name for path in tmp_path.iterdir()) == ["hsa.tsv", "mmu.tsv"]
+
+
+def test_main_combined_reference_table(kegg_standin, tmp_path):
+    output_file = tmp_path / "reference.tsv"
+    argv = ["-o", "map", "ko", "mmu", "-of", str(output_file), "--combined"]
+    assert pull_with_standin(kegg_standin, argv) == []
+
+    header = output_file.read_text().splitlines()[0].split("\t")
+    assert len(header) == 15
+    assert header[:2] == ["ko00010", "ko00020"]
+    assert kegg_standin.requested.count("/list/pathway") == 1
+
+
+def test_main_fills_organism_placeholder_of_one_table(kegg_standin, tmp_path):
+    template = str(tmp_path / "{organism}.tsv")
+    assert pull_with_standin(kegg_standin, ["-o", "mmu", "-of", template]) == []
+    assert pull_with_standin(kegg_standin, ["-o", "hsa", "mmu", "-of", template, "--combined"]) == []
+
+    assert sorted(path.name for path in tmp_path.iterdir()) == ["combined.tsv", "mmu.tsv"]
+    assert len((tmp_path / "combined.tsv").read_text().splitlines()[0].split("\t")) == 352 + 5
+
+
+def test_main_incremental_refresh(kegg_standin, tmp_path):
+    manifest_file = tmp_path / "manifest.json"
+    argv = ["-o", "mmu", "-of", str(tmp_path / "mmu.tsv"), "-m", str(manifest_file)]
+    pull_with_standin(kegg_standin, argv)
+    first_table = (tmp_path / "mmu.tsv").read_text()
+    assert len(kegg_standin.requested) == 2 + 5
+
+    kegg_standin.requested.clear()
+    pull_with_standin(kegg_standin, argv)
+    assert sorted(kegg_standin.requested) == ["/info/pathway", "/list/pathway/mmu"]
+    assert (tmp_path / "mmu.tsv").read_text() == first_table
+
+    kegg_standin.requested.clear()
+    kegg_standin.release = "107.0+/06-01"
+    pull_with_standin(kegg_standin, argv)
+    assert len(kegg_standin.requested) == 2 + 5
+    assert (tmp_path / "mmu.tsv").read_text() == first_table
+    assert '"release": "107.0+/06-01"' in manifest_file.read_text()
+
+
+def test_main_incremental_refresh_refetches_failed_pathways(kegg_standin, tmp_path):
+    manifest_file = tmp_path / "manifest.json"
+    argv = ["-o", "mmu", "-of", str(tmp_path / "mmu.tsv"), "-m", str(manifest_file), "--retries", "0"]
+    pull_with_standin(kegg_standin, argv)
+
+    kegg_standin.release = "107.0+/06-01"
+    kegg_standin.errors["/get/mmu00020/kgml"] = [404]
+    assert [failure.pathway_code for failure in pull_with_standin(kegg_standin, argv)] == ["mmu00020"]
+
+    kegg_standin.requested.clear()
+    assert pull_with_standin(kegg_standin, argv) == []
+    assert "/get/mmu00020/kgml" in kegg_standin.requested
+    assert len((tmp_path / "mmu.tsv").read_text().splitlines()[0].split("\t")) == 5
+
+
+def test_main_parquet_output(kegg_standin, tmp_path):
+    pyarrow_parquet = pytest.importorskip("pyarrow.parquet")
+    output_file = tmp_path / "mmu.parquet"
+    pull_with_standin(kegg_standin, ["-o", "mmu", "-of", str(output_file), "--format", "parquet"])
+
+    table = pyarrow_parquet.read_table(output_file)
+    assert table.num_rows == 5 * 31
+    assert table.schema.metadata[b"kegg_release"] == b"106.0+/05-21"
+    assert table.column("pathway_name")[0].as_py() == "Glycolysis / Gluconeogenesis - Homo sapiens (human)"
+
+
+def test_main_entity_tables(kegg_standin, tmp_path):
+    output_file = tmp_path / "mmu.tsv"
+    manifest_file = tmp_path / "manifest.json"
+    argv = ["-o", "mmu", "-of", str(output_file), "-e", "compound", "gene", "reaction", "-m", str(manifest_file)]
+    pull_with_standin(kegg_standin, argv)
+
+    assert output_file.read_text().splitlines()[1].split("\t")[0] == "C00033"
+    assert (tmp_path / "mmu_gene.tsv").read_text().splitlines()[1].split("\t")[0] == "hsa:226"
+    assert (tmp_path / "mmu_reaction.tsv").exists()
+    assert len(kegg_standin.requested) == 2 + 5
+
+    kegg_standin.requested.clear()
+    pull_with_standin(kegg_standin, [*argv[:-2], "-e", "gene", "-m", str(manifest_file)])
+    assert sorted(kegg_standin.requested) == ["/info/pathway", "/list/pathway/mmu"]
+
+
+def test_main_reaction_graph(kegg_standin, tmp_path):
+    output_file = tmp_path / "mmu.tsv"
+    pull_with_standin(kegg_standin, ["-o", "mmu", "-of", str(output_file), "--graph"])
+
+    with ReactionGraph.load(tmp_path / "mmu.graph") as graph:
+        assert len(graph.pathways) == 5
+        assert graph.metadata["kegg_release"] == "106.0+/05-21"
+        assert graph.pathway_reactions(graph.pathways[0]) == graph.pathway_reactions(graph.pathways[-1])
+
+
+def test_main_snapshot(kegg_standin, tmp_path):
+    snapshot_file = tmp_path / "kegg.snapshot"
+    argv = ["-o", "hsa", "mmu", "-of", str(tmp_path / "{organism}.tsv"), "-e", "gene", "--snapshot", str(snapshot_file)]
+    pull_with_standin(kegg_standin, argv)
+
+    with Snapshot(snapshot_file) as snapshot:
+        assert len(snapshot) == 352 + 5
+        assert snapshot.metadata["organisms"] == ["hsa", "mmu"]
+        assert "mmu00010" in snapshot.pathways_of("C00033")
+        assert snapshot.compounds_of("hsa00010")[0] == "C00022"
+    assert not (tmp_path / "hsa.tsv").exists()
+
+
+def test_main_run_report(kegg_standin, tmp_path):
+    kegg_standin.errors["/get/mmu00010/kgml"] = [503]
+    report_file = tmp_path / "report.json"
+    argv = ["-o", "mmu", "-of", str(tmp_path / "mmu.tsv"), "--report", str(report_file)]
+    pull_with_standin(kegg_standin, argv, backoff=0.01)
+    report = json.loads(report_file.read_text())
+    assert report["organisms"] == ["mmu"]
+    assert report["pathways"]["fetched"] == 5
+    assert report["requests"]["count"] == 1 + 5 + 1
+    assert report["requests"]["retries"] == 1
+    assert report["parse"]["documents"] == 5
+    assert set(report["stages"]) == {"lists", "pull", "write"}
+
+
+def test_main_resume_from_checkpoint(kegg_standin, tmp_path):
+    output_file = tmp_path / "mmu.tsv"
+    journal_file = tmp_path / "mmu.journal"
+    argv = ["-o", "mmu", "-of", str(output_file), "--checkpoint", str(journal_file), "--retries", "0"]
+    kegg_standin.errors["/get/mmu00020/kgml"] = [404]
+    failures = pull_with_standin(kegg_standin, argv)
+    assert [failure.pathway_code for failure in failures] == ["mmu00020"]
+    assert len(journal_file.read_text().splitlines()) == 1 + 4
+
+    kegg_standin.requested.clear()
+    assert pull_with_standin(kegg_standin, [*argv, "--resume"]) == []
+    assert sorted(kegg_standin.requested) == ["/get/mmu00020/kgml", "/info/pathway", "/list/pathway/mmu"]
+    assert len(output_file.read_text().splitlines()[0].split("\t")) == 5
+    assert not journal_file.exists()
+
+
+def test_cli_import_is_light():
+    script = (
+        "import logging, sys\n"
+        "import keggpull.main\n"
+        "heavy = {'aiohttp', 'tqdm', 'pyarrow', 'numpy', 'scipy'}.intersection(sys.modules)\n"
+        "print(sorted(heavy), len(logging.getLogger().handlers), len(keggpull.main.logger.handlers))\n"
+    )
+    output = subprocess.run([sys.executable, "-c", script], check=True, capture_output=True, text=True).stdout
+    assert output.split() == ["[]", "0", "0"]
+
+
+def test_main_annotated_compounds(kegg_standin, tmp_path):
+    output_file = tmp_path / "mmu.tsv"
+    catalog_file = tmp_path / "compounds.tsv"
+    argv = ["-o", "mmu", "-of", str(output_file), "--format", "long"]
+    pull_with_standin(kegg_standin, [*argv, "--annotate", "name", "chebi", "--compound-catalog", str(catalog_file)])
+
+    rows = [row.split("\t") for row in output_file.read_text().splitlines()]
+    assert rows[0] == ["pathway", "pathway_name", "compound", "compound_name", "compound_chebi"]
+    assert ["C00022", "Pyruvate", "15361,32816"] in [row[2:] for row in rows]
+    assert catalog_file.exists()
+    assert kegg_standin.requested.count("/list/compound") == 1
+
+
+def test_main_offline_incremental_refresh(kegg_standin, tmp_path):
+    manifest_file = tmp_path / "manifest.json"
+    argv = ["-o", "mmu", "-of", str(tmp_path / "mmu.tsv"), "-m", str(manifest_file)]
+
+    pull_with_standin(kegg_standin, argv, cache=ResponseCache(tmp_path / "cache"))
+    kegg_standin.requested.clear()
+    assert pull_with_standin(kegg_standin, argv, cache=ResponseCache(tmp_path / "cache", offline=True)) == []
+    assert kegg_standin.requested == []
+    assert '"release": "106.0+/05-21"' in manifest_file.read_text()
+
+
+def test_main_raises_on_failed_pathway_list(kegg_standin, tmp_path):
+    kegg_standin.errors["/list/pathway/mmu"] = [404]
+    with pytest.raises(FetchError):
+        pull_with_standin(kegg_standin, ["-o", "mmu", "-of", str(tmp_path / "mmu.tsv")])
+
+
+def test_run_exits_non_zero_on_failed_pathway_list(tmp_path, monkeypatch):
+    argv = ["keggpull", "-o", "hsa", "-of", str(tmp_path / "hsa.tsv"), "--offline", "--cache-dir", str(tmp_path)]
+    monkeypatch.setattr(sys, "argv", argv)
+    with pytest.raises(SystemExit) as exit_info:
+        run()
+    assert exit_info.value.code == 1
+
+
+def test_main_requires_an_organism(tmp_path):
+    args = init_parser().parse_args(["-of", str(tmp_path / "hsa.tsv")])
+    with pytest.raises(ValueError, match="organism code"):
+        asyncio.run(main(args))
+
+
+@pytest.mark.parametrize("option", [["-c", "0"], ["-r", "-1"], ["--retries", "-1"]])
+def test_run_rejects_invalid_limits(option, monkeypatch):
+    monkeypatch.setattr(sys, "argv", ["keggpull", "-o", "hsa", *option])
+    with pytest.raises(SystemExit) as exit_info:
+        run()
+    assert exit_info.value.code == 2
@@ -0,0 +1,48 @@
+from keggpull.manifest import Manifest, ManifestEntry
+from keggpull.utilities import ExtractedPathway
+
+__author__ = "RGmetab"
+__copyright__ = "RGmetab"
+__license__ = "MIT"
+
+
+def test_manifest_roundtrip(tmp_path):
+    manifest_file = tmp_path / "manifest.json"
+    assert Manifest.load(manifest_file) == Manifest()
+
+    manifest = Manifest("106.0+/05-21")
+    manifest.record(ExtractedPathway("hsa00010", ["C00022", "C00024"], "abc"))
+    manifest.save(manifest_file)
+
+    loaded = Manifest.load(manifest_file)
+    assert loaded.release == "106.0+/05-21"
+    assert loaded.pathways["hsa00010"].compounds == ["C00022", "C00024"]
+
+
+def test_manifest_stale_pathways():
+    manifest = Manifest("106.0", {"hsa00010": ManifestEntry("hsa00010", "abc", 0.0, ["C00022"])})
+
+    assert manifest.stale_pathways(["hsa00010", "hsa00020"], "106.0") == ["hsa00020"]
+    assert manifest.stale_pathways(["hsa00010", "hsa00020"], "107.0") == ["hsa00010", "hsa00020"]
+    assert manifest.stale_pathways(["hsa00010"], None) == ["hsa00010"]
+
+
+def test_manifest_record_unchanged_keeps_compounds():
+    manifest = Manifest("106.0", {"hsa00010": ManifestEntry("hsa00010", "abc", 0.0, ["C00022"])})
+    entry = manifest.record(ExtractedPathway("hsa00010", None, "abc"))
+
+    assert entry.compounds == ["C00022"]
+    assert entry.fetched > 0
+
+
+def test_manifest_entity_types(tmp_path):
+    manifest_file = tmp_path / "manifest.json"
+    manifest = Manifest("106.0", entity_types=["compound", "gene"])
+    manifest.record(ExtractedPathway("hsa00010", ["C00022"], "abc", {"gene": ["hsa:226"]}))
+    manifest.save(manifest_file)
+
+    loaded = Manifest.load(manifest_file)
+    assert loaded.covers(["gene"])
+    assert not loaded.covers(["gene", "reaction"])
+    assert loaded.pathways["hsa00010"].members("gene") == ["hsa:226"]
+    assert loaded.record(ExtractedPathway("hsa00010", None, "abc")).members("gene") == ["hsa:226"]
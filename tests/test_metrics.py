@@ -0,0 +1,41 @@
+import json
+
+from keggpull.metrics import Histogram, RunMetrics
+
+__author__ = "RGmetab"
+__copyright__ = "RGmetab"
+__license__ = "MIT"
+
+
+def test_histogram():
+    histogram = Histogram()
+    assert histogram.quantile(0.5) is None
+    for seconds in (0.001, 0.002, 0.02, 0.3, 45.0):
+        histogram.observe(seconds)
+
+    summary = histogram.as_dict()
+    assert summary["count"] == 5
+    assert summary["p50_ms"] == 25.0
+    assert summary["max_ms"] == 45000.0
+    assert summary["buckets_ms"]["<=5"] == 2
+    assert summary["buckets_ms"][">30000"] == 1
+
+
+def test_run_metrics_report(tmp_path):
+    metrics = RunMetrics()
+    metrics.observe_request(0.05, 1024)
+    metrics.observe_request(0.05, None)
+    metrics.cache_hits = 3
+    metrics.cache_misses = 1
+    metrics.observe_parse(0.5, 2**20)
+    with metrics.stage("pull"):
+        pass
+    metrics.write_report(tmp_path / "report.json")
+
+    report = json.loads((tmp_path / "report.json").read_text())
+    assert report["requests"]["count"] == 2
+    assert report["requests"]["errors"] == 1
+    assert report["requests"]["bytes_received"] == 1024
+    assert report["cache"]["hit_rate"] == 0.75
+    assert report["parse"]["mb_per_s"] == 2.0
+    assert report["stages"]["pull"]["seconds"] >= 0
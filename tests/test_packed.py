@@ -0,0 +1,32 @@
+from array import array
+
+import pytest
+
+from keggpull.packed import PackedFile, write_packed
+
+__author__ = "RGmetab"
+__copyright__ = "RGmetab"
+__license__ = "MIT"
+
+
+def test_packed_roundtrip(tmp_path):
+    path = tmp_path / "arrays.bin"
+    write_packed(path, "test", {"ids": array("I", [3, 1, 2]), "offsets": array("Q", [0, 3])}, labels=["a"])
+
+    with PackedFile(path, "test") as packed:
+        assert packed.header["labels"] == ["a"]
+        assert list(packed.arrays["ids"]) == [3, 1, 2]
+        assert list(packed.arrays["offsets"]) == [0, 3]
+        assert packed.arrays["offsets"].obj is not None
+    assert packed.arrays == {}
+
+
+def test_packed_file_kind(tmp_path):
+    path = tmp_path / "arrays.bin"
+    write_packed(path, "test", {})
+    with pytest.raises(ValueError):
+        PackedFile(path, "reaction_graph")
+
+    (tmp_path / "other.bin").write_bytes(b"not packed" * 4)
+    with pytest.raises(ValueError):
+        PackedFile(tmp_path / "other.bin")
@@ -0,0 +1,96 @@
+import asyncio
+
+from keggpull.pipeline import build_executor, parse_document, parse_documents, pull_pathways
+from keggpull.scheduler import Scheduler
+from keggpull.utilities import ExtractedPathway, PathwayFailure, content_hash
+
+__author__ = "RGmetab"
+__copyright__ = "RGmetab"
+__license__ = "MIT"
+
+
+def test_parse_documents_isolates_failures():
+    failure = PathwayFailure("hsa00020", "status code 500")
+    responses = [
+        ("hsa00010", '<pathway><entry name="cpd:C00022" type="compound"/></pathway>'),
+        failure,
+        ("hsa00030", "<pathway>"),
+    ]
+    parsed = parse_documents(responses)
+
+    assert parsed[0].pathway_code == "hsa00010"
+    assert parsed[0].compounds == ["C00022"]
+    assert parsed[1] is failure
+    assert parsed[2].pathway_code == "hsa00030"
+    assert parsed[2].reason.startswith("invalid KGML")
+
+
+def test_pull_pathways_yields_as_parsed(kegg_standin, run_with_standin):
+    codes = [f"hsa{number:05d}" for number in range(10, 60, 10)]
+    kegg_standin.errors["/get/hsa00030/kgml"] = [404]
+
+    async def pull(client):
+        return [pathway async for pathway in pull_pathways(codes, client, progress=False)]
+
+    pathways = run_with_standin(pull)
+
+    failures = [pathway for pathway in pathways if isinstance(pathway, PathwayFailure)]
+    assert [failure.pathway_code for failure in failures] == ["hsa00030"]
+    assert sorted(pathway.pathway_code for pathway in pathways if pathway not in failures) == [
+        "hsa00010", "hsa00020", "hsa00040", "hsa00050"
+    ]
+
+
+def test_pull_pathways_bounds_pending_tasks(run_with_standin):
+    codes = [f"hsa{number:05d}" for number in range(10, 3010, 10)]
+
+    async def pull(client):
+        most_tasks = 0
+        pathways = []
+        async for pathway in pull_pathways(codes, client, max_pending=4, progress=False):
+            most_tasks = max(most_tasks, len(asyncio.all_tasks()))
+            pathways.append(pathway)
+        return pathways, most_tasks
+
+    pathways, most_tasks = run_with_standin(pull, scheduler=Scheduler(8, rate=None))
+    assert len(pathways) == len(codes)
+    assert most_tasks < 30
+
+
+def test_pull_pathways_in_process_pool(run_with_standin):
+    codes = [f"hsa{number:05d}" for number in range(10, 110, 10)]
+    executor = build_executor(2)
+
+    async def pull(client):
+        return [
+            pathway
+            async for pathway in pull_pathways(codes, client, executor=executor, chunk_size=4, progress=False)
+        ]
+
+    with executor:
+        pathways = run_with_standin(pull)
+
+    assert sorted(pathway.pathway_code for pathway in pathways) == codes
+    assert all(len(pathway.compounds) == 31 for pathway in pathways)
+
+
+def test_parse_documents_skips_known_hashes():
+    document = '<pathway><entry name="cpd:C00022" type="compound"/></pathway>'
+    known_hashes = {"hsa00010": content_hash(document)}
+    parsed = parse_documents([("hsa00010", document), ("hsa00020", document)], known_hashes=known_hashes)
+
+    assert parsed[0] == ExtractedPathway("hsa00010", None, known_hashes["hsa00010"])
+    assert parsed[1] == ExtractedPathway("hsa00020", ["C00022"], known_hashes["hsa00010"])
+
+
+def test_build_executor():
+    assert build_executor(0) is None
+
+
+def test_parse_document_entity_types():
+    document = '<pathway><entry name="cpd:C00022" type="compound"/><entry name="hsa:226" type="gene"/></pathway>'
+    pathway = parse_document("hsa00010", document, entity_types=("compound", "gene"))
+
+    assert pathway.members("compound") == ["C00022"]
+    assert pathway.members("gene") == ["hsa:226"]
+    assert pathway.members("reaction") == []
@@ -0,0 +1,46 @@
+import asyncio
+import time
+
+import pytest
+
+from keggpull.scheduler import Scheduler, TokenBucket
+
+__author__ = "RGmetab"
+__copyright__ = "RGmetab"
+__license__ = "MIT"
+
+
+def test_token_bucket_paces_requests():
+    async def acquire_all():
+        bucket = TokenBucket(rate=50, capacity=1)
+        start = time.monotonic()
+        for _ in range(6):
+            await bucket.acquire()
+        return time.monotonic() - start
+
+    assert asyncio.run(acquire_all()) >= 0.09
+
+
+def test_token_bucket_rejects_zero_rate():
+    with pytest.raises(ValueError):
+        TokenBucket(rate=0)
+
+
+def test_scheduler_bounds_in_flight():
+    in_flight = 0
+    peak = 0
+
+    async def request(scheduler):
+        nonlocal in_flight, peak
+        async with scheduler:
+            in_flight += 1
+            peak = max(peak, in_flight)
+            await asyncio.sleep(0.01)
+            in_flight -= 1
+
+    async def run_all():
+        scheduler = Scheduler(max_in_flight=2, rate=None)
+        await asyncio.gather(*[request(scheduler) for _ in range(10)])
+
+    asyncio.run(run_all())
+    assert peak == 2
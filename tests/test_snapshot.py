@@ -0,0 +1,52 @@
+import pytest
+
+from keggpull import Snapshot
+from keggpull.argparser import init_query_parser
+from keggpull.compounds import PathwayMembership
+from keggpull.snapshot import run_query, write_snapshot
+
+__author__ = "RGmetab"
+__copyright__ = "RGmetab"
+__license__ = "MIT"
+
+
+@pytest.fixture
+def snapshot_file(tmp_path):
+    membership = PathwayMembership()
+    membership.add("hsa00020", ["C00036", "C00022"])
+    membership.add("hsa00010", ["C00022", "C00031", "C00022"])
+    membership.add("mmu00010", ["C00031"])
+    write_snapshot(membership, tmp_path / "kegg.snapshot", metadata={"kegg_release": "106.0"})
+    return tmp_path / "kegg.snapshot"
+
+
+def test_snapshot_lookups(snapshot_file):
+    with Snapshot(snapshot_file) as snapshot:
+        assert len(snapshot) == 3
+        assert "hsa00010" in snapshot
+        assert "hsa00030" not in snapshot
+        assert snapshot.metadata == {"kegg_release": "106.0"}
+        assert snapshot.compounds_of("hsa00010") == ["C00022", "C00031"]
+        assert snapshot.pathways_of("C00022") == ["hsa00010", "hsa00020"]
+        assert snapshot.pathways_of("C00031") == ["hsa00010", "mmu00010"]
+        assert snapshot.pathways_of("C99999") == []
+        assert isinstance(snapshot.compound_ids("hsa00020"), memoryview)
+        with pytest.raises(KeyError):
+            snapshot.compounds_of("hsa00030")
+
+
+def test_snapshot_reverse_index(snapshot_file):
+    with Snapshot(snapshot_file) as snapshot:
+        assert snapshot.organisms == ["hsa", "mmu"]
+        assert snapshot.postings("C00031") == [("hsa", "hsa00010"), ("mmu", "mmu00010")]
+        assert snapshot.query(["C00031", "C00022"]) == [("hsa", "hsa00010")]
+        assert snapshot.query(["C00031"], ["mmu"]) == [("mmu", "mmu00010")]
+        assert snapshot.query(["C00031", "C99999"]) == []
+        assert snapshot.query([]) == []
+
+
+def test_run_query(snapshot_file, capsys):
+    args = init_query_parser().parse_args([str(snapshot_file), "C00022", "C00036"])
+    run_query(args)
+
+    assert capsys.readouterr().out == "hsa\thsa00020\n"
@@ -2,17 +2,25 @@ import re
 import xml.etree.ElementTree as ET
 
 import pytest
-import requests
 
+from keggpull.client import KeggResponse
 from keggpull.utilities import (
+    atomic_write,
+    batched,
+    build_entities_from_text,
+    build_path_from_text,
     build_xml_root,
+    extract_compounds,
+    extract_entities,
     pad_list_items,
     parse_organism_pathways,
+    parse_pathway_names,
     pathway_kgml_url,
     pathway_list_url,
     pathway_text_url,
     rest_response_validator,
     sort_lists,
+    split_flat_file_entries,
     transpose_table,
 )
 
@@ -68,12 +76,11 @@ def test_pad_list_items():
 
 
 def test_rest_response_validator():
-    mock_response_object = requests.Response()
     test_cases = {200: True, 400: False, 404: False, 300: False, 100: False, 500: False}
 
     for test_code, response in test_cases.items():
-        mock_response_object.status_code = test_code
-        assert rest_response_validator(mock_response_object) == response
+        api_response = KeggResponse("https://rest.kegg.jp/list/pathway/hsa", test_code, b"")
+        assert rest_response_validator(api_response) == response
 
 
 def test_pathway_kgml_url():
@@ -90,6 +97,11 @@ def test_pathway_list_url():
         assert pathway_list_url(argument) == response
 
 
+def test_pathway_list_url_reference():
+    for reference in ["map", "ko"]:
+        assert pathway_list_url(reference) == "https://rest.kegg.jp/list/pathway"
+
+
 def test_pathway_text_url():
     keys = ["hsa00010", "aga01124"]
     vals = [f"https://rest.kegg.jp/get/{value}" for value in keys]
@@ -110,9 +122,77 @@ def test_parse_organism_pathways():
     assert len(mathching) == total_items
 
 
+def test_parse_pathway_names():
+    with open("tests/data/hsa_pathway_list.tsv", "r") as fh:
+        names = parse_pathway_names(fh.read())
+
+    assert len(names) == 352
+    assert names["hsa00010"] == "Glycolysis / Gluconeogenesis - Homo sapiens (human)"
+
+
 def test_build_xml_root():
     with open("tests/data/hsa00010.kgml", "r") as fh:
         input_data = fh.read()
     assert isinstance(build_xml_root(input_data), ET.Element)
 
 
+def test_batched():
+    assert batched(list(range(5)), 2) == [[0, 1], [2, 3], [4]]
+
+
+def test_split_flat_file_entries():
+    with open("tests/data/hsa00010.txt", "r") as fh:
+        flat_file = fh.read()
+    batch = flat_file + flat_file.replace("hsa00010", "hsa00020")
+
+    entries = split_flat_file_entries(batch)
+    assert list(entries) == ["hsa00010", "hsa00020"]
+    assert entries["hsa00020"].startswith("ENTRY       hsa00020")
+
+
+def test_build_path_from_text_matches_kgml():
+    with open("tests/data/hsa00010.txt", "r") as fh:
+        flat_file = fh.read()
+    with open("tests/data/hsa00010.kgml", "r") as fh:
+        kgml = fh.read()
+
+    compounds = build_path_from_text("hsa00010", flat_file)
+    assert compounds[:3] == ["hsa00010", "C00022", "C00024"]
+    assert len(compounds) == 32
+    assert set(compounds) == set(extract_compounds("hsa00010", kgml, "kgml"))
+
+
+def test_build_entities_from_text():
+    with open("tests/data/hsa00010.txt", "r") as fh:
+        flat_file = fh.read()
+    entities = build_entities_from_text("hsa00010", flat_file)
+
+    assert entities["compound"] == build_path_from_text("hsa00010", flat_file)[1:]
+    assert entities["gene"] == ["hsa:3101", "hsa:3098"]
+    assert entities["ortholog"] == ["K00844"]
+    assert entities["map"] == []
+
+
+def test_extract_entities_from_kgml():
+    with open("tests/data/hsa00010.kgml", "r") as fh:
+        document = fh.read()
+    entities = extract_entities("hsa00010", document, "kgml", ("compound", "gene", "reaction", "relation"))
+
+    assert entities["compound"] == extract_compounds("hsa00010", document)[1:]
+    assert entities["gene"][:3] == ["hsa:226", "hsa:229", "hsa:230"]
+    assert len(entities["gene"]) == len(set(entities["gene"]))
+    assert "R01070" in entities["reaction"]
+    assert len(entities["relation"]) > 0
+
+
+def test_atomic_write_keeps_old_file_on_failure(tmp_path):
+    path = tmp_path / "table.tsv"
+    with atomic_write(path) as fh:
+        fh.write("old\n")
+    with pytest.raises(RuntimeError):
+        with atomic_write(path) as fh:
+            fh.write("partial")
+            raise RuntimeError("interrupted")
+
+    assert path.read_text() == "old\n"
+    assert [file.name for file in tmp_path.iterdir()] == ["table.tsv"]
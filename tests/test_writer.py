@@ -0,0 +1,84 @@
+import io
+import json
+
+import pytest
+
+from keggpull import writer
+from keggpull.utilities import pad_list_items, sort_lists, transpose_table
+from keggpull.writer import write_table, write_wide_rows, write_wide_table
+
+__author__ = "RGmetab"
+__copyright__ = "RGmetab"
+__license__ = "MIT"
+
+
+def test_write_wide_rows():
+    fh = io.StringIO()
+    columns = [("hsa00010", ["C00022", "C00024"]), ("hsa00020", []), ("hsa00030", ["C00031"])]
+
+    assert write_wide_rows(fh, columns) == 3
+    assert fh.getvalue() == "hsa00010\thsa00020\thsa00030\nC00022\t\tC00031\nC00024\t\t\n"
+
+
+def test_write_wide_table_matches_pad_and_transpose(tmp_path):
+    pathways = [["hsa00059", "C00032"], ["hsa00010"], ["hsa00030", "C02032", "C00032", "C11111"]]
+    output_file = tmp_path / "table.tsv"
+    write_wide_table(((pathway[0], pathway[1:]) for pathway in pathways), str(output_file))
+
+    expected = transpose_table(pad_list_items(sort_lists(pathways)))
+    assert output_file.read_text() == "".join("\t".join(line) + "\n" for line in expected)
+
+
+COLUMNS = [("hsa00020", ["C00036"]), ("hsa00010", ["C00022", "C00024"])]
+NAMES = {"hsa00010": "Glycolysis / Gluconeogenesis", "hsa00020": "Citrate cycle (TCA cycle)"}
+
+
+def test_write_long_table(tmp_path):
+    output_file = tmp_path / "long.tsv"
+    write_table(COLUMNS, str(output_file), "long", NAMES)
+
+    assert output_file.read_text().splitlines() == [
+        "pathway\tpathway_name\tcompound",
+        "hsa00010\tGlycolysis / Gluconeogenesis\tC00022",
+        "hsa00010\tGlycolysis / Gluconeogenesis\tC00024",
+        "hsa00020\tCitrate cycle (TCA cycle)\tC00036",
+    ]
+
+
+def test_write_long_table_with_annotations(tmp_path):
+    output_file = tmp_path / "long.tsv"
+    annotations = {"compound_name": {"C00022": "Pyruvate", "C00036": "Oxaloacetate"}}
+    write_table(COLUMNS, str(output_file), "long", annotations=annotations)
+
+    assert output_file.read_text().splitlines() == [
+        "pathway\tpathway_name\tcompound\tcompound_name",
+        "hsa00010\t\tC00022\tPyruvate",
+        "hsa00010\t\tC00024\t",
+        "hsa00020\t\tC00036\tOxaloacetate",
+    ]
+
+
+@pytest.mark.parametrize("output_format", ["arrow", "feather", "parquet"])
+def test_write_columnar_table(tmp_path, output_format, monkeypatch):
+    pa = pytest.importorskip("pyarrow")
+    import pyarrow.feather
+    import pyarrow.parquet
+
+    monkeypatch.setattr(writer, "BATCH_ROWS", 2)
+    output_file = tmp_path / f"table.{output_format}"
+    write_table(COLUMNS, str(output_file), output_format, NAMES, "106.0+/05-21")
+
+    if output_format == "parquet":
+        table = pyarrow.parquet.read_table(output_file)
+    else:
+        table = pyarrow.feather.read_table(output_file)
+    assert table.column("pathway").to_pylist() == ["hsa00010", "hsa00010", "hsa00020"]
+    assert table.column("compound").to_pylist() == ["C00022", "C00024", "C00036"]
+    assert table.schema.metadata[b"kegg_release"] == b"106.0+/05-21"
+    assert json.loads(table.schema.metadata[b"pathway_names"]) == NAMES
+    assert isinstance(table, pa.Table)
+
+
+def test_write_table_unknown_format(tmp_path):
+    with pytest.raises(ValueError):
+        write_table(COLUMNS, str(tmp_path / "table"), "xlsx")